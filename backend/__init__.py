@@ -1,4 +1,4 @@
-from flask import Flask, send_from_directory
+from flask import Flask, request
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from dotenv import load_dotenv
@@ -8,9 +8,39 @@ load_dotenv()
 
 db = SQLAlchemy()
 
+def engine_options(database_url):
+    """Connection pool settings, sized so every worker together stays under the database's limit.
+
+    ``DB_MAX_CONNECTIONS`` is split across ``WEB_CONCURRENCY`` gunicorn workers
+    (gunicorn reads the same variable); ``DB_POOL_SIZE`` and
+    ``DB_MAX_OVERFLOW`` override the split.
+    """
+    if database_url.startswith('sqlite'):
+        return {}
+    
+    workers = max(int(os.getenv('WEB_CONCURRENCY', '1')), 1)
+    per_worker = max(int(os.getenv('DB_MAX_CONNECTIONS', '20')) // workers, 2)
+    pool_size = int(os.getenv('DB_POOL_SIZE', max(per_worker * 3 // 4, 1)))
+    options = {
+        'pool_size': pool_size,
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', max(per_worker - pool_size, 0))),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', '10')),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '300')),
+        'pool_pre_ping': True
+    }
+    statement_timeout = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '5000'))
+    if database_url.startswith('postgresql') and statement_timeout:
+        options['connect_args'] = {'options': f'-c statement_timeout={statement_timeout}'}
+    return options
+
 def create_app():
-    static_folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'dist')
-    app = Flask(__name__, static_folder=static_folder, static_url_path='')
+    # dist/ is served from memory by backend.static_files, not by Flask's static route.
+    app = Flask(__name__, static_folder=None)
+    from backend.json_provider import FastJSONProvider
+    app.json = FastJSONProvider(app)
+    app.config['FRONTEND_DIST'] = os.getenv(
+        'FRONTEND_DIST', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'dist')
+    )
     
     database_url = os.getenv('DATABASE_URL', 'sqlite:///radlands.db')
     if database_url.startswith('postgres://'):
@@ -18,6 +48,8 @@ def create_app():
     
     app.config['SQLALCHEMY_DATABASE_URI'] = database_url
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(database_url)
+    app.config['CATALOG_SNAPSHOT'] = os.getenv('CATALOG_SNAPSHOT', os.path.join(app.instance_path, 'catalog.json'))
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
     
     CORS(app, resources={r"/api/*": {"origins": "*"}})
@@ -27,21 +59,39 @@ def create_app():
     from backend.routes import api_bp
     app.register_blueprint(api_bp, url_prefix='/api')
     
+    from backend.importer import import_cards_command
+    app.cli.add_command(import_cards_command)
+    
+    from backend.schema import setup_db_command
+    app.cli.add_command(setup_db_command)
+    
+    from backend.archive import archive_games_command
+    app.cli.add_command(archive_games_command)
+    
+    from backend.static_files import StaticManifest, compress_static_command
+    app.cli.add_command(compress_static_command)
+    manifest = StaticManifest(app.config['FRONTEND_DIST'])
+    
     @app.route('/', defaults={'path': ''})
     @app.route('/<path:path>')
     def serve_frontend(path):
-        if path and os.path.exists(os.path.join(app.static_folder, path)):
-            return send_from_directory(app.static_folder, path)
-        return send_from_directory(app.static_folder, 'index.html')
+        return manifest.response(app, request, path)
+    
+    # Production runs `flask setup-db` once from build.sh; local SQLite databases set themselves up.
+    auto_setup = os.getenv('AUTO_SETUP_DB')
+    if auto_setup == '1' or (auto_setup is None and database_url.startswith('sqlite')):
+        with app.app_context():
+            from backend.schema import setup_database
+            if setup_database():
+                print("Database seeded with Radlands cards")
+            # Connections must not be shared with workers forked from a preloaded app.
+            db.engine.dispose()
     
     with app.app_context():
-        db.create_all()
-        
-        from backend.models import Card
-        from backend.seeds import seed_cards
-        
-        if Card.query.count() == 0:
-            seed_cards()
-            print("Database seeded with Radlands cards")
+        from backend.catalog import load_snapshot_file
+        load_snapshot_file()
+    
+    from backend import boot
+    boot.install(app)
     
     return app
@@ -0,0 +1,137 @@
+"""Append-only log of game actions with periodic full-state snapshots.
+
+Every write to a game bumps its board version by one and appends one
+``GameAction`` whose ``seq`` is that new version. Every ``SNAPSHOT_INTERVAL``
+versions the full state is materialized into ``GameSnapshot``, so the state
+at any version is the nearest earlier snapshot plus a short tail of actions.
+``BoardState`` remains the materialized current state that reads use.
+"""
+import copy
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm.attributes import flag_modified
+
+from backend import db
+from backend.jsonpatch import apply_patch
+from backend.models import BoardState, GameAction, GameEvent, GameSnapshot, CARD_LIST_FIELDS
+
+SNAPSHOT_INTERVAL = 50
+
+BOARD_FIELDS = (
+    'player1_water', 'player2_water',
+    'player1_camps', 'player2_camps',
+    'player1_columns', 'player2_columns',
+) + CARD_LIST_FIELDS + ('start_player', 'current_player', 'turn_number')
+
+EVENT_FIELDS = ('id', 'player', 'event_name', 'position', 'water_cost', 'effect')
+
+
+def capture_state(board_state, events):
+    state = {field: copy.deepcopy(getattr(board_state, field)) for field in BOARD_FIELDS}
+    state["events"] = [{field: getattr(event, field) for field in EVENT_FIELDS} for event in events]
+    return state
+
+
+def initial_state(board_values):
+    """State of a freshly created game from the values it was inserted with."""
+    state = {
+        "player1_water": 3,
+        "player2_water": 3,
+        "turn_number": 1
+    }
+    state.update({field: copy.deepcopy(board_values[field]) for field in BOARD_FIELDS if field in board_values})
+    state["events"] = []
+    return state
+
+
+def apply_action(state, kind, payload):
+    """Apply one logged action to a state dict in place."""
+    if kind in ('water', 'board'):
+        state.update(copy.deepcopy(payload))
+    elif kind == 'patch':
+        apply_patch(state, payload["operations"])
+    elif kind == 'event_added':
+        state["events"].append(dict(payload))
+    elif kind == 'event_removed':
+        state["events"] = [event for event in state["events"] if event["id"] != payload["id"]]
+    elif kind == 'turn':
+        current_player = payload["current_player"]
+        state.update(
+            current_player=current_player,
+            turn_number=payload["turn_number"],
+            player1_water=payload["player1_water"],
+            player2_water=payload["player2_water"]
+        )
+        for event in state["events"]:
+            if event["player"] == current_player:
+                event["position"] -= 1
+        state["events"] = [event for event in state["events"] if event["position"] > 0]
+    elif kind != 'finish':
+        raise ValueError(f"Cannot replay {kind!r} actions")
+    return state
+
+
+def snapshot_row(game_id, seq, state):
+    return {"game_id": game_id, "seq": seq, "state": state}
+
+
+def take_snapshot(game_id, seq):
+    board_state = db.session.scalars(
+        select(BoardState).where(BoardState.game_id == game_id).execution_options(populate_existing=True)
+    ).one()
+    events = db.session.scalars(
+        select(GameEvent).where(GameEvent.game_id == game_id).order_by(GameEvent.position, GameEvent.id)
+    ).all()
+    db.session.add(GameSnapshot(game_id=game_id, seq=seq, state=capture_state(board_state, events)))
+
+
+def record_action(game_id, seq, kind, payload, snapshot=False):
+    """Append an action in the caller's transaction, snapshotting every SNAPSHOT_INTERVAL versions."""
+    db.session.add(GameAction(game_id=game_id, seq=seq, kind=kind, payload=payload))
+    if snapshot or seq % SNAPSHOT_INTERVAL == 0:
+        db.session.flush()
+        take_snapshot(game_id, seq)
+
+
+def state_at(game_id, seq):
+    """Rebuild the state at board version ``seq``, or None if no snapshot precedes it."""
+    snapshot = db.session.scalars(
+        select(GameSnapshot)
+        .where(GameSnapshot.game_id == game_id, GameSnapshot.seq <= seq)
+        .order_by(GameSnapshot.seq.desc())
+        .limit(1)
+    ).first()
+    if snapshot is None:
+        return None
+
+    state = copy.deepcopy(snapshot.state)
+    actions = db.session.execute(
+        select(GameAction.kind, GameAction.payload)
+        .where(GameAction.game_id == game_id, GameAction.seq > snapshot.seq, GameAction.seq <= seq)
+        .order_by(GameAction.seq)
+    )
+    for kind, payload in actions:
+        apply_action(state, kind, payload)
+    return state
+
+
+def restore_state(board_state, state):
+    """Overwrite a game's board and event queue with a rebuilt state."""
+    for field in BOARD_FIELDS:
+        setattr(board_state, field, copy.deepcopy(state[field]))
+    # Bump the version even when only the event queue differs.
+    flag_modified(board_state, 'turn_number')
+
+    game_id = board_state.game_id
+    db.session.execute(delete(GameEvent).where(GameEvent.game_id == game_id))
+    events = [dict(event, game_id=game_id) for event in state["events"]]
+    if events:
+        # SQLite hands out the highest deleted id again, so an event removed
+        # since ``state`` may have lost its id to another game's event.
+        taken = set(db.session.scalars(
+            select(GameEvent.id).where(GameEvent.id.in_([event["id"] for event in events]))
+        ))
+        for event in events:
+            if event["id"] in taken:
+                del event["id"]
+        db.session.execute(insert(GameEvent), events)
@@ -0,0 +1,265 @@
+"""Monte Carlo tree search over the rules engine for computer players.
+
+States are immutable and share everything a move did not touch, so
+expanding a node costs one ``GameState.apply``. Nodes are keyed by
+``GameState.key()``, so move orders that reach the same position share
+their statistics. Each search stops at a hard wall-clock budget.
+
+Searches run in a small process pool per worker, like the simulator's
+games. The request thread waits without holding the GIL, so the worker's
+other threads keep serving while a search runs. The pool has one process
+per search slot, and the slots cap how many searches a worker runs at
+once. The stored deck order is treated as known, the same way the
+simulator plays.
+"""
+import math
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from backend.engine import CAMP, CardTable, GameState, material
+
+DEFAULT_BUDGET_MS = 250
+MAX_BUDGET_MS = 2000
+MAX_CONCURRENT_SEARCHES = 2
+MAX_NODES = 50000
+ROLLOUT_DEPTH = 24
+EXPLORATION = 1.4
+MAX_CACHED_DECISIONS = 512
+# Extra seconds to wait for a search process past the budget before giving up on it
+RESULT_GRACE = 1.0
+
+_searches = threading.BoundedSemaphore(MAX_CONCURRENT_SEARCHES)
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+# In a search process: the rules table of the catalog version searched last
+_table = None
+_table_version = None
+
+
+class SearchBusy(Exception):
+    """Raised when no search slot frees up within the budget, or the search process does not answer."""
+
+
+class SearchFailed(Exception):
+    """Raised when the search process raises on the state it was given."""
+
+
+class Node:
+    __slots__ = ('state', 'untried', 'children', 'visits', 'value')
+
+    def __init__(self, state, rng):
+        self.state = state
+        self.untried = state.legal_moves()
+        rng.shuffle(self.untried)
+        self.children = []
+        self.visits = 0
+        # Total reward from player 0's point of view
+        self.value = 0.0
+
+
+def _evaluate(state):
+    """Reward in [0, 1] for player 0 at the end of a rollout."""
+    if state.winner is not None:
+        return 1.0 if state.winner == 0 else 0.0
+    if state.is_terminal:
+        return 0.5
+    return 1.0 / (1.0 + math.exp(-material(state, 0) / 8.0))
+
+
+def _rollout(state, rng):
+    for _ in range(ROLLOUT_DEPTH):
+        if state.is_terminal:
+            break
+        state = state.apply(rng.choice(state.legal_moves()))
+    return _evaluate(state)
+
+
+def _select(node):
+    log_visits = math.log(node.visits)
+    sign = node.state.current == 0
+    best, best_score = None, None
+    for move, child in node.children:
+        mean = child.value / child.visits
+        score = (mean if sign else 1.0 - mean) + EXPLORATION * math.sqrt(log_visits / child.visits)
+        if best_score is None or score > best_score:
+            best, best_score = (move, child), score
+    return best
+
+
+def search(state, budget_ms=DEFAULT_BUDGET_MS, rng=None):
+    """Best move for the current player within ``budget_ms`` milliseconds.
+
+    Returns ``(move, stats)``; ``stats`` holds the iteration count, the
+    root child's visits and its estimated win rate for the mover.
+    """
+    rng = rng or random.Random()
+    deadline = time.perf_counter() + budget_ms / 1000.0
+    nodes = {}
+    root = nodes[state.key()] = Node(state, rng)
+    iterations = 0
+
+    while True:
+        node = root
+        path = [root]
+        while not node.untried and node.children:
+            node = _select(node)[1]
+            path.append(node)
+
+        if node.untried and len(nodes) < MAX_NODES:
+            move = node.untried.pop()
+            child_state = node.state.apply(move)
+            key = child_state.key()
+            child = nodes.get(key)
+            if child is None:
+                child = nodes[key] = Node(child_state, rng)
+            node.children.append((move, child))
+            node = child
+            path.append(node)
+
+        reward = _rollout(node.state, rng)
+        for visited in path:
+            visited.visits += 1
+            visited.value += reward
+
+        iterations += 1
+        if time.perf_counter() >= deadline or (not root.untried and len(root.children) == 1):
+            break
+
+    move, child = max(root.children, key=lambda entry: entry[1].visits)
+    mean = child.value / child.visits
+    return move, {
+        "iterations": iterations,
+        "nodes": len(nodes),
+        "visits": child.visits,
+        "win_rate": round(mean if state.current == 0 else 1.0 - mean, 4)
+    }
+
+
+class DecisionCache:
+    """Per-worker LRU of chosen moves keyed by game position, so retries answer instantly."""
+
+    def __init__(self, max_size=MAX_CACHED_DECISIONS):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, decision):
+        with self._lock:
+            self._entries[key] = decision
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+decisions = DecisionCache()
+
+
+def _pool_executor():
+    """This process's search pool, started on first use and again after a fork or a crash."""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ProcessPoolExecutor(max_workers=MAX_CONCURRENT_SEARCHES)
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _reset_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def start_pool():
+    """Start the search processes now, before the worker starts its request threads."""
+    _pool_executor().submit(int).result()
+
+
+def _search_task(catalog_version, cards, players, current, turn, winner, deadline):
+    global _table, _table_version
+    if _table is None or _table_version != catalog_version:
+        _table = CardTable(cards)
+        _table_version = catalog_version
+    state = GameState(_table, players, current, turn, winner)
+    # time.monotonic() reads the same clock in every process.
+    return search(state, max((deadline - time.monotonic()) * 1000.0, 1.0))
+
+
+def choose_move(state, catalog, budget_ms=DEFAULT_BUDGET_MS):
+    """Search ``state`` with at most ``budget_ms`` of wall time, waiting included.
+
+    ``catalog`` is the CatalogSnapshot the state was loaded from. The search
+    process rebuilds its rules table from it when the catalog has changed.
+    Raises SearchBusy if no search slot frees up within the budget or the
+    search process fails to answer, and SearchFailed if the search itself
+    raises.
+    """
+    key = state.key()
+    cached = decisions.get(key)
+    if cached is not None:
+        return cached[0], dict(cached[1], cached=True)
+
+    deadline = time.monotonic() + budget_ms / 1000.0
+    if not _searches.acquire(timeout=budget_ms / 1000.0):
+        raise SearchBusy()
+    try:
+        pool = _pool_executor()
+        try:
+            future = pool.submit(_search_task, catalog.version, catalog.cards, state.players,
+                                 state.current, state.turn, state.winner, deadline)
+            move, stats = future.result(timeout=deadline - time.monotonic() + RESULT_GRACE)
+        except TimeoutError:
+            raise SearchBusy()
+        except BrokenProcessPool:
+            _reset_pool(pool)
+            raise SearchBusy()
+        except Exception as error:
+            raise SearchFailed(f"{type(error).__name__}: {error}") from error
+    finally:
+        _searches.release()
+
+    decisions.put(key, (move, stats))
+    return move, dict(stats, cached=False)
+
+
+def _target(target):
+    if target is None:
+        return None
+    player, column, slot = target
+    return {"player": player + 1, "column": column, "slot": 'camp' if slot == CAMP else slot}
+
+
+def describe_move(move):
+    """JSON form of an engine move tuple, with 1-based players like the rest of the API."""
+    kind = move[0]
+    if kind == 'play':
+        return {"kind": kind, "card_id": move[1], "column": move[2], "slot": move[3]}
+    if kind == 'event':
+        return {"kind": kind, "card_id": move[1]}
+    if kind == 'junk':
+        return {"kind": kind, "card_id": move[1], "target": _target(move[2])}
+    if kind == 'ability':
+        return {
+            "kind": kind,
+            "column": move[1],
+            "slot": 'camp' if move[2] == CAMP else move[2],
+            "target": _target(move[3])
+        }
+    return {"kind": kind}
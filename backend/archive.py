@@ -0,0 +1,188 @@
+"""Cold storage for games that are no longer played.
+
+Archiving moves a game's board, event queue, action log and snapshots into
+one ``ArchivedGame`` row. That row holds compact JSON compressed with zlib.
+The ``games`` row stays, so listings and statistics still see the game.
+Reads fall back to the archive when a game has no board. Archived games are
+read-only: write routes answer 404 for them, as they do for unknown games.
+
+Run ``flask archive-games`` from a cron job to keep the hot tables small.
+"""
+import json
+import os
+import zlib
+from datetime import datetime, timedelta
+
+import click
+from sqlalchemy import delete, exists, insert, or_, select, tuple_, update
+
+from backend import db
+from backend.action_log import capture_state
+from backend.models import ArchivedGame, BoardState, Game, GameAction, GameEvent, GameSnapshot
+
+DEFAULT_BATCH_SIZE = 200
+STALE_DAYS = int(os.getenv('ARCHIVE_STALE_DAYS', '30'))
+COMPRESSION_LEVEL = 6
+
+
+def encode(data):
+    return zlib.compress(json.dumps(data, separators=(',', ':')).encode('utf-8'), COMPRESSION_LEVEL)
+
+
+def decode(blob):
+    return json.loads(zlib.decompress(blob))
+
+
+def load(game_id):
+    """Decoded archive of one game, or None if it is not archived."""
+    blob = db.session.scalar(select(ArchivedGame.data).where(ArchivedGame.game_id == game_id))
+    return decode(blob) if blob is not None else None
+
+
+def load_many(game_ids):
+    rows = db.session.execute(
+        select(ArchivedGame.game_id, ArchivedGame.data).where(ArchivedGame.game_id.in_(game_ids))
+    )
+    return {game_id: decode(blob) for game_id, blob in rows}
+
+
+def archived_version(game_id):
+    return db.session.scalar(select(ArchivedGame.version).where(ArchivedGame.game_id == game_id))
+
+
+def serialize_archived(game, data):
+    """``get_game`` body for an archived game; the same shape as a live one."""
+    state = data["state"]
+    return {
+        "id": game.id,
+        "player1_name": game.player1_name,
+        "player2_name": game.player2_name,
+        "status": game.status,
+        "winner": game.winner,
+        "version": data["version"],
+        "board_state": {
+            field: state[field] for field in (
+                "player1_water", "player2_water",
+                "player1_camps", "player2_camps",
+                "player1_columns", "player2_columns",
+                "current_player", "turn_number"
+            )
+        },
+        "events": state["events"]
+    }
+
+
+def _candidates(batch_size, stale_before, after):
+    """Ids of games that still have a board and are either over or untouched since ``stale_before``."""
+    recent_action = exists().where(GameAction.game_id == Game.id, GameAction.created_at >= stale_before)
+    return db.session.scalars(
+        select(Game.id)
+        .join(BoardState, BoardState.game_id == Game.id)
+        .where(
+            Game.id > after,
+            or_(
+                Game.status != 'active',
+                (Game.updated_at < stale_before) & ~recent_action
+            )
+        )
+        .order_by(Game.id)
+        .limit(batch_size)
+    ).all()
+
+
+def archive_batch(game_ids):
+    """Archive ``game_ids`` in the current transaction with one query per table."""
+    # The row lock holds writers off on Postgres until the batch commits.
+    boards = db.session.scalars(
+        select(BoardState).where(BoardState.game_id.in_(game_ids)).with_for_update()
+    ).all()
+    events, actions, snapshots = {}, {}, {}
+    for event in db.session.scalars(
+        select(GameEvent).where(GameEvent.game_id.in_(game_ids)).order_by(GameEvent.position, GameEvent.id)
+    ):
+        events.setdefault(event.game_id, []).append(event)
+    for game_id, seq, kind, payload in db.session.execute(
+        select(GameAction.game_id, GameAction.seq, GameAction.kind, GameAction.payload)
+        .where(GameAction.game_id.in_(game_ids)).order_by(GameAction.game_id, GameAction.seq)
+    ):
+        actions.setdefault(game_id, []).append([seq, kind, payload])
+    for game_id, seq, state in db.session.execute(
+        select(GameSnapshot.game_id, GameSnapshot.seq, GameSnapshot.state)
+        .where(GameSnapshot.game_id.in_(game_ids)).order_by(GameSnapshot.game_id, GameSnapshot.seq)
+    ):
+        snapshots.setdefault(game_id, []).append([seq, state])
+
+    rows = []
+    for board in boards:
+        game_id = board.game_id
+        rows.append({
+            "game_id": game_id,
+            "version": board.version,
+            "data": encode({
+                "version": board.version,
+                "state": capture_state(board, events.get(game_id, [])),
+                "actions": actions.get(game_id, []),
+                "snapshots": snapshots.get(game_id, [])
+            })
+        })
+    if not rows:
+        return 0
+
+    # Every write bumps the version, so a board whose version moved since it
+    # was read took a write that its archive would lose. Those games stay hot
+    # until the next run.
+    archived_ids = set(db.session.scalars(
+        delete(BoardState)
+        .where(tuple_(BoardState.game_id, BoardState.version).in_([(row["game_id"], row["version"]) for row in rows]))
+        .returning(BoardState.game_id),
+        execution_options={'synchronize_session': False}
+    ))
+    rows = [row for row in rows if row["game_id"] in archived_ids]
+    if not rows:
+        return 0
+
+    archived_ids = [row["game_id"] for row in rows]
+    db.session.execute(insert(ArchivedGame), rows)
+    for model in (GameEvent, GameAction, GameSnapshot):
+        db.session.execute(
+            delete(model).where(model.game_id.in_(archived_ids)),
+            execution_options={'synchronize_session': False}
+        )
+    db.session.execute(
+        update(Game).where(Game.id.in_(archived_ids), Game.status == 'active').values(status='abandoned'),
+        execution_options={'synchronize_session': False}
+    )
+    return len(rows)
+
+
+def archive_games(batch_size=DEFAULT_BATCH_SIZE, stale_days=STALE_DAYS, limit=None, progress=None):
+    """Archive finished and stale games in batches, committing after each one.
+
+    Returns the number of games archived.
+    """
+    stale_before = datetime.utcnow() - timedelta(days=stale_days)
+    archived = 0
+    after = 0
+    while limit is None or archived < limit:
+        size = batch_size if limit is None else min(batch_size, limit - archived)
+        game_ids = _candidates(size, stale_before, after)
+        if not game_ids:
+            break
+        archived += archive_batch(game_ids)
+        db.session.commit()
+        db.session.expunge_all()
+        after = game_ids[-1]
+        if progress is not None:
+            progress(archived)
+    return archived
+
+
+@click.command('archive-games')
+@click.option('--batch-size', default=DEFAULT_BATCH_SIZE, show_default=True)
+@click.option('--stale-days', default=STALE_DAYS, show_default=True,
+              help="Also archive active games with no writes for this many days.")
+@click.option('--limit', type=int, help="Stop after archiving this many games.")
+def archive_games_command(batch_size, stale_days, limit):
+    """Move finished and stale games into compressed archive rows."""
+    archived = archive_games(batch_size, stale_days, limit, progress=lambda count: click.echo(f"Archived {count} games"))
+    click.echo(f"Archived {archived} games in total")
@@ -0,0 +1,58 @@
+"""Worker boot timing.
+
+gunicorn.conf.py calls ``mark_start`` after each fork and ``mark_ready``
+once the worker can accept requests. Each worker logs its fork-to-ready
+time and how long its first request took. Without gunicorn the clock
+starts when the app is created.
+"""
+import logging
+import os
+import threading
+import time
+
+from flask import g
+
+_started = time.perf_counter()
+_first_request = True
+_lock = threading.Lock()
+
+
+def _logger(app=None):
+    # gunicorn's error log shows INFO records; Flask's own logger would drop them.
+    logger = logging.getLogger('gunicorn.error')
+    if not logger.handlers and app is not None:
+        logger = app.logger
+    return logger
+
+
+def mark_start():
+    global _started, _first_request
+    _started = time.perf_counter()
+    _first_request = True
+
+
+def mark_ready():
+    _logger().info("Worker %s ready %.1f ms after fork", os.getpid(), (time.perf_counter() - _started) * 1000)
+
+
+def install(app):
+    mark_start()
+
+    @app.before_request
+    def time_first_request():
+        global _first_request
+        if not _first_request:
+            return
+        with _lock:
+            if not _first_request:
+                return
+            _first_request = False
+        g.boot_request_started = time.perf_counter()
+
+    @app.teardown_request
+    def log_first_request(exception=None):
+        started = g.pop('boot_request_started', None)
+        if started is not None:
+            now = time.perf_counter()
+            _logger(app).info("Worker %s served its first request in %.1f ms, %.1f ms after start",
+                              os.getpid(), (now - started) * 1000, (now - _started) * 1000)
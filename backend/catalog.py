@@ -0,0 +1,321 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+from flask import current_app, request
+from sqlalchemy import select, type_coerce, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.dialects.postgresql import JSONB
+
+from backend import db, json_provider
+from backend.engine import CardTable
+from backend.models import Card, CatalogVersion
+
+_lock = threading.Lock()
+_snapshot = None
+_checked_at = 0.0
+
+# Seconds between checks of the shared catalog version; a change made through
+# another worker is picked up at most this late.
+CHECK_INTERVAL = float(os.getenv('CATALOG_CHECK_INTERVAL', '1'))
+
+CARD_FIELDS = {
+    "id": Card.id,
+    "name": Card.name,
+    "type": Card.card_type,
+    "water_cost": Card.water_cost,
+    "abilities": Card.abilities,
+    "traits": Card.traits,
+    "junk_effect": Card.junk_effect,
+    "event_effect": Card.event_effect,
+    "bomb_position": Card.bomb_position,
+    "initial_draw": Card.initial_draw,
+    "expansion": Card.expansion
+}
+
+DECK_CARD_TYPES = ('person', 'event')
+STARTING_HAND_CARDS = ('Raiders', 'Water Silo')
+
+MAX_PAGE_SIZE = 200
+DEFAULT_PAGE_SIZE = 50
+
+
+def serialize_card(card):
+    return {
+        "id": card.id,
+        "name": card.name,
+        "type": card.card_type,
+        "water_cost": card.water_cost,
+        "abilities": card.abilities,
+        "traits": card.traits,
+        "junk_effect": card.junk_effect,
+        "event_effect": card.event_effect,
+        "bomb_position": card.bomb_position,
+        "initial_draw": card.initial_draw,
+        "expansion": card.expansion
+    }
+
+
+def parse_fields(value):
+    """Turn a ``fields=`` parameter into a list of known field names."""
+    if not value:
+        return list(CARD_FIELDS)
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in CARD_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown card fields: {', '.join(unknown)}")
+    return fields
+
+
+def project(cards, fields):
+    if len(fields) == len(CARD_FIELDS):
+        return cards
+    return [{field: card[field] for field in fields} for card in cards]
+
+
+def page_cards(fields, card_type='', after=None, limit=DEFAULT_PAGE_SIZE):
+    """Load one keyset page of cards, selecting only the requested columns.
+
+    Returns ``(cards, next_cursor)``; ``next_cursor`` is None on the last page.
+    """
+    selected = list(dict.fromkeys(['id'] + fields))
+    query = Card.query.with_entities(*[CARD_FIELDS[field] for field in selected])
+    if card_type:
+        query = query.filter(Card.card_type == card_type)
+    if after is not None:
+        query = query.filter(Card.id > after)
+    rows = query.order_by(Card.id).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1][0]
+
+    cards = [{field: row[selected.index(field)] for field in fields} for row in rows]
+    return cards, next_cursor
+
+
+def cards_with_trait(trait, card_type=''):
+    """Cards whose traits include ``trait``, in id order.
+
+    On Postgres this is a JSONB containment query served by the GIN index
+    on ``cards.traits``; elsewhere the in-memory snapshot is filtered.
+    """
+    snapshot = get_snapshot()
+    if db.engine.dialect.name == 'postgresql':
+        stmt = select(Card.id).where(type_coerce(Card.traits, JSONB).contains([trait])).order_by(Card.id)
+        if card_type:
+            stmt = stmt.where(Card.card_type == card_type)
+        return [snapshot.by_id[card_id] for card_id in db.session.scalars(stmt) if card_id in snapshot.by_id]
+
+    cards = snapshot.by_type.get(card_type, []) if card_type else snapshot.cards
+    return [card for card in cards if trait in (card["traits"] or [])]
+
+
+def build_deck_pool(cards, expansions=None):
+    return tuple(
+        card["id"] for card in cards
+        if card["type"] in DECK_CARD_TYPES and (not expansions or card["expansion"] in expansions)
+    )
+
+
+def starting_hand_ids(cards_by_name):
+    return [cards_by_name[name]["id"] for name in STARTING_HAND_CARDS if name in cards_by_name]
+
+
+def deal(deck_pool, starting_hand, camps, rng=random):
+    """Shuffle a deck from the pool and draw the opening hand for a player's camps.
+
+    Returns ``(deck, hand)``.
+    """
+    deck = rng.sample(deck_pool, len(deck_pool))
+    initial_draw = sum(camp.get('initial_draw') or 0 for camp in camps)
+    return deck[initial_draw:], deck[:initial_draw] + list(starting_hand)
+
+
+class CatalogSnapshot:
+    """Immutable, pre-serialized view of the card table.
+
+    Bodies are encoded once per card type so GET /api/cards never touches
+    the database or the JSON encoder while the snapshot is current.
+    """
+
+    def __init__(self, cards, catalog_version=None):
+        self.cards = cards
+        # CatalogVersion row the cards were read at; None when unknown
+        self.catalog_version = catalog_version
+        self.by_id = {card["id"]: card for card in cards}
+        self.by_name = {card["name"]: card for card in cards}
+        self._deck_pools = {}
+        self._card_table = None
+        self.by_type = {}
+        for card in cards:
+            self.by_type.setdefault(card["type"], []).append(card)
+
+        encode = current_app.json.dumps
+        full_body = (encode(cards) + "\n").encode("utf-8")
+        self.version = hashlib.sha1(full_body).hexdigest()[:16]
+
+        self._bodies = {'': (full_body, self.version)}
+        for card_type, typed_cards in self.by_type.items():
+            body = (encode(typed_cards) + "\n").encode("utf-8")
+            self._bodies[card_type] = (body, f"{self.version}-{card_type}")
+        self._empty = (b"[]\n", f"{self.version}-empty")
+        # JSON ETag -> msgpack body, converted from the JSON body on first request
+        self._packed = {}
+
+    def deck_pool(self, expansions=None):
+        """Card ids a player deck is shuffled from, optionally limited to some expansions."""
+        key = frozenset(expansions) if expansions else None
+        pool = self._deck_pools.get(key)
+        if pool is None:
+            pool = self._deck_pools[key] = build_deck_pool(self.cards, key)
+        return pool
+
+    def card_table(self):
+        """Rules engine view of the catalog, built on first use."""
+        if self._card_table is None:
+            self._card_table = CardTable(self.cards)
+        return self._card_table
+
+    def starting_hand(self):
+        return starting_hand_ids(self.by_name)
+
+    def body(self, card_type=''):
+        return self._bodies.get(card_type, self._empty)
+
+    def packed(self, card_type=''):
+        body, etag = self.body(card_type)
+        packed = self._packed.get(etag)
+        if packed is None:
+            packed = self._packed[etag] = json_provider.repack(body)
+        return packed, etag + json_provider.MSGPACK_ETAG_SUFFIX
+
+    def response(self, card_type=''):
+        if json_provider.wants_msgpack():
+            body, etag = self.packed(card_type)
+            mimetype = json_provider.MSGPACK_MIMETYPE
+        else:
+            body, etag = self.body(card_type)
+            mimetype = 'application/json'
+        response = current_app.response_class(body, mimetype=mimetype)
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        if json_provider.msgpack is not None:
+            response.vary.add('Accept')
+        return response.make_conditional(request)
+
+
+def _snapshot_file():
+    return current_app.config.get('CATALOG_SNAPSHOT')
+
+
+def current_catalog_version():
+    """The shared catalog version, or None if it cannot be read (e.g. before ``setup-db``)."""
+    # Its own connection, so a failure never spoils the caller's transaction.
+    try:
+        with db.engine.connect() as connection:
+            return connection.scalar(select(CatalogVersion.version).where(CatalogVersion.id == 1)) or 0
+    except SQLAlchemyError:
+        return None
+
+
+def bump_catalog_version():
+    """Record a change to the cards table for every worker; commits."""
+    updated = db.session.execute(
+        update(CatalogVersion).where(CatalogVersion.id == 1).values(version=CatalogVersion.version + 1)
+    ).rowcount
+    if not updated:
+        db.session.add(CatalogVersion(id=1, version=1))
+    db.session.commit()
+
+
+def _is_stale(snapshot):
+    """Compare the snapshot with the shared version, at most once per CHECK_INTERVAL."""
+    global _checked_at
+    now = time.monotonic()
+    if now - _checked_at < CHECK_INTERVAL:
+        return False
+    _checked_at = now
+    version = current_catalog_version()
+    return version is not None and version != snapshot.catalog_version
+
+
+def get_snapshot():
+    global _snapshot
+    snapshot = _snapshot
+    if snapshot is not None and _is_stale(snapshot):
+        with _lock:
+            if _snapshot is snapshot:
+                _snapshot = None
+        snapshot = None
+    if snapshot is None:
+        with _lock:
+            if _snapshot is None:
+                version = current_catalog_version()
+                cards = Card.query.order_by(Card.id).all()
+                _snapshot = CatalogSnapshot([serialize_card(card) for card in cards], version)
+            snapshot = _snapshot
+    return snapshot
+
+
+def load_snapshot_file():
+    """Install the snapshot from the prebuilt catalog file, if there is one and none is loaded.
+
+    Called while the app is created. Under ``gunicorn --preload`` that happens
+    once in the master, so every worker starts with the parsed catalog. The
+    file records the catalog version it was written at; if the database has
+    moved on since, the first version check replaces it.
+    """
+    global _snapshot
+    path = _snapshot_file()
+    if not path or not os.path.exists(path):
+        return False
+    with open(path, 'rb') as stream:
+        data = json.load(stream)
+    # Files from before the version was recorded hold the bare card list.
+    cards, version = (data["cards"], data.get("catalog_version")) if isinstance(data, dict) else (data, None)
+    with _lock:
+        if _snapshot is None:
+            _snapshot = CatalogSnapshot(cards, version)
+    return True
+
+
+def write_snapshot_file():
+    """Write the current catalog to the snapshot file, replacing it atomically."""
+    path = _snapshot_file()
+    if not path:
+        return None
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    snapshot = get_snapshot()
+    body, _ = snapshot.body()
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'wb') as stream:
+        stream.write(b'{"catalog_version":%s,"cards":' % json.dumps(snapshot.catalog_version).encode())
+        stream.write(body.rstrip(b"\n"))
+        stream.write(b"}\n")
+    os.replace(temporary, path)
+    return path
+
+
+def invalidate():
+    """Drop this worker's snapshot; the next read reloads it from the database.
+
+    Only affects this process; use ``refresh`` after changing the cards table.
+    """
+    global _snapshot
+    with _lock:
+        _snapshot = None
+
+
+def refresh():
+    """Publish a change to the cards table: bump the shared version, reload and rewrite the file.
+
+    Other workers see the new version on their next check and reload too.
+    """
+    bump_catalog_version()
+    invalidate()
+    write_snapshot_file()
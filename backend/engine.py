@@ -0,0 +1,651 @@
+"""Server-side Radlands rules engine.
+
+Pure Python with no Flask or database imports so simulation tooling can use
+it directly. Game state is immutable: ``GameState.apply`` returns a new state
+that shares every player, column and card it did not touch, so copies are
+cheap and states can be used as dictionary keys. Each ``PlayerState`` caches
+its unprotected targets, so they are only recomputed for the player a move
+actually changed.
+
+Effects are read from the card text in the catalog ("Damage unprotected
+card", "Draw 2 cards", ...). Multi-target effects hit the chosen target
+first and then the first remaining legal target.
+"""
+import re
+
+MAX_PEOPLE_PER_COLUMN = 2
+COLUMNS = 3
+STARTING_WATER = 3
+EVENT_SLOTS = 3
+MAX_TURNS = 60
+
+CAMP = -1
+
+# Effect verbs
+DAMAGE = 'damage'
+DESTROY = 'destroy'
+RESTORE = 'restore'
+DRAW = 'draw'
+WATER = 'water'
+PUNK = 'punk'
+DISCARD = 'discard'
+NOOP = 'noop'
+
+TARGETED_SCOPES = ('unprotected', 'any', 'person', 'camp', 'damaged', 'column', 'own')
+
+_NUMBER_RE = re.compile(r'\d+')
+
+
+class Effect:
+    __slots__ = ('verb', 'scope', 'count')
+
+    def __init__(self, verb, scope=None, count=1):
+        self.verb = verb
+        self.scope = scope
+        self.count = count
+
+    @property
+    def targeted(self):
+        return self.scope in TARGETED_SCOPES
+
+    def __repr__(self):
+        return f"Effect({self.verb!r}, {self.scope!r}, {self.count})"
+
+
+def parse_effect(text):
+    """Read a card's ability, junk or event text into an Effect."""
+    if not text:
+        return None
+    lowered = text.lower()
+    numbers = _NUMBER_RE.findall(lowered)
+    count = int(numbers[0]) if numbers else 1
+
+    if 'damage' in lowered or 'destroy' in lowered:
+        verb = DAMAGE if 'damage' in lowered else DESTROY
+        if 'all people' in lowered:
+            scope = 'all_people'
+        elif 'all camps' in lowered:
+            scope = 'all_camps'
+        elif 'column' in lowered:
+            scope = 'column'
+        elif 'damaged' in lowered:
+            scope = 'damaged'
+        elif 'camp' in lowered:
+            scope = 'camp'
+        elif 'any' in lowered and 'person' in lowered:
+            scope = 'person'
+        elif 'any' in lowered:
+            scope = 'any'
+        else:
+            scope = 'unprotected'
+        return Effect(verb, scope, count)
+    if 'restore' in lowered:
+        return Effect(RESTORE, 'all_own' if 'all' in lowered else 'own', count)
+    if 'draw' in lowered:
+        return Effect(DRAW, None, count)
+    if 'water' in lowered:
+        return Effect(WATER, None, count)
+    if 'punk' in lowered:
+        return Effect(PUNK, None, count)
+    if 'discard' in lowered:
+        return Effect(DISCARD, None, count)
+    return Effect(NOOP)
+
+
+class CardInfo:
+    __slots__ = ('id', 'name', 'type', 'cost', 'ability', 'ability_cost', 'junk', 'event', 'bomb_position')
+
+    def __init__(self, card):
+        self.id = card["id"]
+        self.name = card["name"]
+        self.type = card.get("type") or card.get("card_type")
+        self.cost = card.get("water_cost") or 0
+        abilities = card.get("abilities") or []
+        first = abilities[0] if abilities and isinstance(abilities[0], dict) else {}
+        self.ability = parse_effect(first.get("description") or first.get("effect"))
+        self.ability_cost = first.get("water_cost", first.get("cost")) or 0
+        self.junk = parse_effect(card.get("junk_effect"))
+        self.event = parse_effect(card.get("event_effect"))
+        self.bomb_position = card.get("bomb_position") or 0
+
+
+class CardTable:
+    """Card rules by id, built from catalog card dicts."""
+
+    def __init__(self, cards):
+        self.by_id = {card["id"]: CardInfo(card) for card in cards}
+        self.by_name = {info.name: info for info in self.by_id.values()}
+
+    def __getitem__(self, card_id):
+        return self.by_id[card_id]
+
+    def get(self, card_id):
+        return self.by_id.get(card_id)
+
+
+class Person:
+    __slots__ = ('card_id', 'damaged', 'ready', 'punk')
+
+    def __init__(self, card_id, damaged=False, ready=True, punk=False):
+        self.card_id = card_id
+        self.damaged = damaged
+        self.ready = ready
+        self.punk = punk
+
+    def key(self):
+        return (self.card_id, self.damaged, self.ready, self.punk)
+
+
+class Camp:
+    __slots__ = ('card_id', 'damaged', 'destroyed', 'ready')
+
+    def __init__(self, card_id, damaged=False, destroyed=False, ready=True):
+        self.card_id = card_id
+        self.damaged = damaged
+        self.destroyed = destroyed
+        self.ready = ready
+
+    def key(self):
+        return (self.card_id, self.damaged, self.destroyed, self.ready)
+
+
+class PlayerState:
+    __slots__ = ('water', 'camps', 'columns', 'hand', 'deck', 'discard', 'events', '_unprotected', '_key')
+
+    def __init__(self, water, camps, columns, hand, deck, discard, events):
+        self.water = water
+        self.camps = camps
+        self.columns = columns
+        self.hand = hand
+        self.deck = deck
+        self.discard = discard
+        self.events = events
+        self._unprotected = None
+        self._key = None
+
+    def replace(self, **changes):
+        values = {slot: changes.get(slot, getattr(self, slot)) for slot in self.__slots__ if slot[0] != '_'}
+        return PlayerState(**values)
+
+    def with_column(self, index, people):
+        columns = self.columns[:index] + (tuple(people),) + self.columns[index + 1:]
+        return self.replace(columns=columns)
+
+    def with_camp(self, index, camp):
+        return self.replace(camps=self.camps[:index] + (camp,) + self.camps[index + 1:])
+
+    @property
+    def unprotected(self):
+        """(column, slot) pairs an opponent may hit with unprotected-only effects."""
+        if self._unprotected is None:
+            targets = []
+            for index, people in enumerate(self.columns):
+                if people:
+                    targets.append((index, 0))
+                elif index < len(self.camps) and not self.camps[index].destroyed:
+                    targets.append((index, CAMP))
+            self._unprotected = tuple(targets)
+        return self._unprotected
+
+    def people(self):
+        for index, people in enumerate(self.columns):
+            for slot in range(len(people)):
+                yield index, slot
+
+    def live_camps(self):
+        return [index for index, camp in enumerate(self.camps) if not camp.destroyed]
+
+    @property
+    def defeated(self):
+        return bool(self.camps) and all(camp.destroyed for camp in self.camps)
+
+    def draw(self, count=1):
+        drawn = self.deck[:count]
+        return self.replace(deck=self.deck[count:], hand=self.hand + drawn)
+
+    def key(self):
+        if self._key is None:
+            self._key = (
+                self.water,
+                tuple(camp.key() for camp in self.camps),
+                tuple(tuple(person.key() for person in people) for people in self.columns),
+                tuple(sorted(self.hand)),
+                len(self.deck),
+                self.events
+            )
+        return self._key
+
+
+class GameState:
+    __slots__ = ('cards', 'players', 'current', 'turn', 'winner')
+
+    def __init__(self, cards, players, current=0, turn=1, winner=None):
+        self.cards = cards
+        self.players = players
+        self.current = current
+        self.turn = turn
+        self.winner = winner
+
+    @property
+    def is_terminal(self):
+        return self.winner is not None or self.turn > MAX_TURNS
+
+    def key(self):
+        return (self.current, self.turn, self.players[0].key(), self.players[1].key())
+
+    # Move generation
+
+    def targets(self, effect, player):
+        """Legal targets of ``effect`` used by ``player``, as (player, column, slot) tuples."""
+        scope = effect.scope
+        opponent = 1 - player
+        other = self.players[opponent]
+        if scope == 'unprotected':
+            people_only = effect.verb == DESTROY
+            return [(opponent, column, slot) for column, slot in other.unprotected
+                    if not (people_only and slot == CAMP)]
+        if scope == 'any':
+            return ([(opponent, column, slot) for column, slot in other.people()] +
+                    [(opponent, column, CAMP) for column in other.live_camps()])
+        if scope == 'person':
+            return [(opponent, column, slot) for column, slot in other.people()]
+        if scope == 'camp':
+            return [(opponent, column, CAMP) for column in other.live_camps()]
+        if scope == 'damaged':
+            return ([(opponent, column, slot) for column, slot in other.people()
+                     if other.columns[column][slot].damaged] +
+                    [(opponent, column, CAMP) for column in other.live_camps() if other.camps[column].damaged])
+        if scope == 'column':
+            return [(opponent, column, None) for column, people in enumerate(other.columns) if people]
+        if scope == 'own':
+            own = self.players[player]
+            return ([(player, column, slot) for column, slot in own.people()
+                     if own.columns[column][slot].damaged] +
+                    [(player, column, CAMP) for column in own.live_camps() if own.camps[column].damaged])
+        return [None]
+
+    def _effect_moves(self, effect, move):
+        if not effect.targeted:
+            return [move + (None,)]
+        return [move + (target,) for target in self.targets(effect, self.current)]
+
+    def legal_moves(self):
+        if self.is_terminal:
+            return []
+        me = self.players[self.current]
+        cards = self.cards
+        moves = []
+        for card_id in dict.fromkeys(me.hand):
+            info = cards.get(card_id)
+            if info is None:
+                continue
+            if info.type == 'event':
+                if info.cost <= me.water and self._event_slot(me, info) is not None:
+                    moves.append(('event', card_id))
+            elif info.cost <= me.water:
+                for column, people in enumerate(me.columns):
+                    if len(people) < MAX_PEOPLE_PER_COLUMN:
+                        moves.append(('play', card_id, column, 0))
+                        if people:
+                            moves.append(('play', card_id, column, len(people)))
+            if info.junk is not None:
+                moves.extend(self._effect_moves(info.junk, ('junk', card_id)))
+
+        for column, slot in me.people():
+            person = me.columns[column][slot]
+            if person.punk or not person.ready:
+                continue
+            info = cards.get(person.card_id)
+            if info and info.ability and info.ability_cost <= me.water:
+                moves.extend(self._effect_moves(info.ability, ('ability', column, slot)))
+        for column in me.live_camps():
+            camp = me.camps[column]
+            info = cards.get(camp.card_id)
+            if camp.ready and info and info.ability and info.ability_cost <= me.water:
+                moves.extend(self._effect_moves(info.ability, ('ability', column, CAMP)))
+
+        moves.append(('end',))
+        return moves
+
+    @staticmethod
+    def _event_slot(player, info):
+        taken = {position for position, _ in player.events}
+        for position in range(max(1, info.bomb_position), EVENT_SLOTS + 1):
+            if position not in taken:
+                return position
+        return None
+
+    # Move application
+
+    def apply(self, move):
+        """Return the state after ``move``; the current state is left untouched."""
+        players = list(self.players)
+        me = self.current
+        player = players[me]
+        kind = move[0]
+
+        if kind == 'end':
+            return self._next_turn(players)
+
+        if kind == 'play':
+            _, card_id, column, slot = move
+            info = self.cards[card_id]
+            hand = list(player.hand)
+            hand.remove(card_id)
+            people = list(player.columns[column])
+            if len(people) >= MAX_PEOPLE_PER_COLUMN:
+                raise ValueError(f"Column {column} is full")
+            people.insert(slot, Person(card_id, ready=False))
+            players[me] = player.replace(water=player.water - info.cost, hand=tuple(hand)).with_column(column, people)
+        elif kind == 'event':
+            _, card_id = move
+            info = self.cards[card_id]
+            hand = list(player.hand)
+            hand.remove(card_id)
+            position = self._event_slot(player, info)
+            if position is None:
+                raise ValueError("Event queue is full")
+            events = tuple(sorted(player.events + ((position, card_id),)))
+            players[me] = player.replace(water=player.water - info.cost, hand=tuple(hand), events=events)
+        elif kind == 'junk':
+            _, card_id, target = move
+            hand = list(player.hand)
+            hand.remove(card_id)
+            players[me] = player.replace(hand=tuple(hand), discard=player.discard + (card_id,))
+            _resolve(self.cards, players, me, self.cards[card_id].junk, target)
+        elif kind == 'ability':
+            _, column, slot, target = move
+            if slot == CAMP:
+                camp = player.camps[column]
+                info = self.cards[camp.card_id]
+                player = player.with_camp(column, Camp(camp.card_id, camp.damaged, camp.destroyed, ready=False))
+            else:
+                person = player.columns[column][slot]
+                info = self.cards[person.card_id]
+                people = list(player.columns[column])
+                people[slot] = Person(person.card_id, person.damaged, False, person.punk)
+                player = player.with_column(column, people)
+            players[me] = player.replace(water=player.water - info.ability_cost)
+            _resolve(self.cards, players, me, info.ability, target)
+        else:
+            raise ValueError(f"Unknown move: {move!r}")
+
+        return GameState(self.cards, tuple(players), me, self.turn, _winner(players))
+
+    def _next_turn(self, players):
+        me = 1 - self.current
+        turn = self.turn + (1 if me == 0 else 0)
+        player = players[me]
+
+        resolved = []
+        events = []
+        for position, card_id in player.events:
+            if position - 1 <= 0:
+                resolved.append(card_id)
+            else:
+                events.append((position - 1, card_id))
+        player = player.replace(events=tuple(events))
+
+        columns = tuple(
+            tuple(Person(p.card_id, p.damaged, True, p.punk) for p in people)
+            for people in player.columns
+        )
+        camps = tuple(Camp(c.card_id, c.damaged, c.destroyed, True) for c in player.camps)
+        players[me] = player.replace(water=STARTING_WATER, columns=columns, camps=camps).draw(1)
+
+        for card_id in resolved:
+            players[me] = players[me].replace(discard=players[me].discard + (card_id,))
+            _resolve(self.cards, players, me, self.cards[card_id].event, None)
+
+        return GameState(self.cards, tuple(players), me, turn, _winner(players))
+
+
+def _winner(players):
+    if players[0].defeated:
+        return 1
+    if players[1].defeated:
+        return 0
+    return None
+
+
+def material(state, player):
+    """Material balance from ``player``'s point of view, for search and greedy play."""
+    if state.winner is not None:
+        return 1000 if state.winner == player else -1000
+    score = 0
+    for index, side in enumerate(state.players):
+        value = 0
+        for camp in side.camps:
+            value += 0 if camp.destroyed else (6 if not camp.damaged else 3)
+        for people in side.columns:
+            for person in people:
+                value += 1 if person.punk else (2 if person.damaged else 3)
+        value += len(side.hand) * 0.5
+        score += value if index == player else -value
+    return score
+
+
+def _auto_target(cards, players, me, effect):
+    state = GameState(cards, tuple(players), me)
+    targets = state.targets(effect, me)
+    return targets[0] if targets else None
+
+
+def _resolve(cards, players, me, effect, target):
+    """Apply an effect for player ``me`` to the mutable ``players`` list."""
+    if effect is None or effect.verb == NOOP:
+        return
+    verb = effect.verb
+
+    if verb == DRAW:
+        players[me] = players[me].draw(effect.count)
+    elif verb == WATER:
+        players[me] = players[me].replace(water=players[me].water + effect.count)
+    elif verb == PUNK:
+        for _ in range(effect.count):
+            _gain_punk(players, me)
+    elif verb == DISCARD:
+        for index, player in enumerate(players):
+            if player.hand:
+                players[index] = player.replace(hand=player.hand[1:], discard=player.discard + player.hand[:1])
+    elif effect.scope == 'all_people':
+        for index, player in enumerate(players):
+            for column, slot in reversed(list(player.people())):
+                _hit(players, verb, index, column, slot)
+    elif effect.scope == 'all_camps':
+        for index, player in enumerate(players):
+            for column in player.live_camps():
+                _hit(players, verb, index, column, CAMP)
+    elif verb == RESTORE and effect.scope == 'all_own':
+        for column, slot in list(players[me].people()):
+            _restore(players, me, column, slot)
+        for column in players[me].live_camps():
+            _restore(players, me, column, CAMP)
+    else:
+        for hit in range(effect.count):
+            if target is None or hit > 0:
+                target = _auto_target(cards, players, me, effect)
+            if target is None:
+                return
+            owner, column, slot = target
+            if verb == RESTORE:
+                _restore(players, owner, column, slot)
+            elif slot is None:
+                for person_slot in reversed(range(len(players[owner].columns[column]))):
+                    _hit(players, verb, owner, column, person_slot)
+            else:
+                _hit(players, verb, owner, column, slot)
+
+
+def _hit(players, verb, owner, column, slot):
+    player = players[owner]
+    if slot == CAMP:
+        camp = player.camps[column]
+        if camp.destroyed:
+            return
+        destroyed = verb == DESTROY or camp.damaged
+        players[owner] = player.with_camp(column, Camp(camp.card_id, not destroyed, destroyed, camp.ready))
+        return
+
+    people = list(player.columns[column])
+    if slot >= len(people):
+        return
+    person = people[slot]
+    if verb == DESTROY or person.damaged or person.punk:
+        del people[slot]
+        players[owner] = player.with_column(column, people).replace(discard=player.discard + (person.card_id,))
+    else:
+        people[slot] = Person(person.card_id, True, person.ready, person.punk)
+        players[owner] = player.with_column(column, people)
+
+
+def _restore(players, owner, column, slot):
+    player = players[owner]
+    if slot == CAMP:
+        camp = player.camps[column]
+        if camp.damaged and not camp.destroyed:
+            players[owner] = player.with_camp(column, Camp(camp.card_id, False, False, camp.ready))
+    else:
+        person = player.columns[column][slot]
+        if person.damaged:
+            people = list(player.columns[column])
+            people[slot] = Person(person.card_id, False, person.ready, person.punk)
+            players[owner] = player.with_column(column, people)
+
+
+def _gain_punk(players, me):
+    player = players[me]
+    if not player.deck:
+        return
+    for column, people in enumerate(player.columns):
+        if len(people) < MAX_PEOPLE_PER_COLUMN:
+            punk = Person(player.deck[0], ready=False, punk=True)
+            players[me] = player.replace(deck=player.deck[1:]).with_column(column, people + (punk,))
+            return
+
+
+# Loading board state
+
+def _entry_card_id(entry):
+    if isinstance(entry, int):
+        return entry
+    if isinstance(entry, dict):
+        card = entry.get("card")
+        if isinstance(card, dict) and isinstance(card.get("id"), int):
+            return card["id"]
+        for key in ("card_id", "id"):
+            if isinstance(entry.get(key), int):
+                return entry[key]
+    return None
+
+
+def _flag(entry, *keys):
+    return isinstance(entry, dict) and any(entry.get(key) for key in keys)
+
+
+def load_person(entry):
+    card_id = _entry_card_id(entry)
+    if card_id is None:
+        raise ValueError(f"Cannot read a card id from {entry!r}")
+    return Person(
+        card_id,
+        damaged=_flag(entry, "isDamaged", "damaged"),
+        ready=not isinstance(entry, dict) or entry.get("isReady", entry.get("ready", True)) is not False,
+        punk=_flag(entry, "isPunk", "punk")
+    )
+
+
+def load_camp(entry):
+    card_id = _entry_card_id(entry)
+    if card_id is None:
+        raise ValueError(f"Cannot read a card id from {entry!r}")
+    return Camp(
+        card_id,
+        damaged=_flag(entry, "isDamaged", "damaged"),
+        destroyed=_flag(entry, "isDestroyed", "destroyed")
+    )
+
+
+def validate_board(columns=None, camps=None):
+    """Structural rule check for client-supplied columns and camps; returns a list of errors.
+
+    Board writes sync the table after any number of moves, including effects
+    the engine does not model, so only the resulting layout is checked and
+    not the transition that led to it.
+    """
+    errors = []
+    if columns is not None:
+        if not isinstance(columns, list) or len(columns) != COLUMNS:
+            errors.append(f"Expected {COLUMNS} columns")
+        else:
+            for index, people in enumerate(columns):
+                if not isinstance(people, list):
+                    errors.append(f"Column {index} must be a list")
+                    continue
+                if len(people) > MAX_PEOPLE_PER_COLUMN:
+                    errors.append(f"Column {index} holds more than {MAX_PEOPLE_PER_COLUMN} people")
+                for entry in people:
+                    if _entry_card_id(entry) is None:
+                        errors.append(f"Column {index} has a card without an id")
+                    elif _flag(entry, "isDestroyed", "destroyed"):
+                        errors.append(f"Column {index} has a destroyed person")
+    if camps is not None:
+        if not isinstance(camps, list) or len(camps) > COLUMNS:
+            errors.append(f"Expected at most {COLUMNS} camps")
+        elif any(_entry_card_id(camp) is None for camp in camps):
+            errors.append("Camp without an id")
+    return errors
+
+
+def validate_board_fields(values):
+    """validate_board over a mapping of board field names (player1_columns, ...) to values."""
+    errors = []
+    for field, value in values.items():
+        if field.endswith('_columns'):
+            field_errors = validate_board(columns=value)
+        elif field.endswith('_camps'):
+            field_errors = validate_board(camps=value)
+        else:
+            continue
+        errors.extend(f"{field}: {error}" for error in field_errors)
+    return errors
+
+
+def load_player(water, camps, columns, hand, deck, discard, events):
+    return PlayerState(
+        water=water if water is not None else STARTING_WATER,
+        camps=tuple(load_camp(camp) for camp in camps or []),
+        columns=tuple(tuple(load_person(entry) for entry in people) for people in (columns or [[], [], []])),
+        hand=tuple(hand or ()),
+        deck=tuple(deck or ()),
+        discard=tuple(discard or ()),
+        events=tuple(sorted(events))
+    )
+
+
+def load_state(cards, board, events=()):
+    """Build a GameState from a BoardState (or any object with the same attributes).
+
+    ``events`` are GameEvent-like objects; they are matched to event cards by name.
+    """
+    queues = ([], [])
+    for event in events:
+        info = cards.by_name.get(event.event_name)
+        if info is not None and event.player in (1, 2):
+            queues[event.player - 1].append((event.position, info.id))
+
+    players = tuple(
+        load_player(
+            getattr(board, f'player{number}_water'),
+            getattr(board, f'player{number}_camps'),
+            getattr(board, f'player{number}_columns'),
+            getattr(board, f'player{number}_hand'),
+            getattr(board, f'player{number}_deck'),
+            getattr(board, f'player{number}_discard'),
+            queues[number - 1]
+        )
+        for number in (1, 2)
+    )
+    state = GameState(cards, players, (board.current_player or 1) - 1, board.turn_number or 1)
+    state.winner = _winner(players)
+    return state
@@ -0,0 +1,25 @@
+from sqlalchemy import delete, update
+
+from backend import db
+from backend.models import GameEvent
+
+
+def advance_events(game_id, player):
+    """Move every event of ``player`` one slot forward and resolve those that leave the queue.
+
+    Runs as one bulk UPDATE plus one DELETE ... RETURNING inside the caller's
+    transaction and returns the resolved events as dicts, in queue order.
+    """
+    queue = (GameEvent.game_id == game_id, GameEvent.player == player)
+    db.session.execute(
+        update(GameEvent).where(*queue).values(position=GameEvent.position - 1),
+        execution_options={'synchronize_session': False}
+    )
+    resolved = db.session.execute(
+        delete(GameEvent).where(*queue, GameEvent.position <= 0).returning(
+            GameEvent.id, GameEvent.player, GameEvent.event_name,
+            GameEvent.position, GameEvent.water_cost, GameEvent.effect
+        ),
+        execution_options={'synchronize_session': False}
+    ).all()
+    return [row._asdict() for row in sorted(resolved, key=lambda row: (row.position, row.id))]
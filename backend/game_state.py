@@ -0,0 +1,164 @@
+import threading
+from collections import OrderedDict
+
+from flask import abort, current_app, request
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+
+from backend import archive, db, json_provider
+from backend.models import Game, BoardState
+
+MAX_CACHED_GAMES = 1024
+
+
+def serialize_event(event):
+    return {
+        "id": event.id,
+        "player": event.player,
+        "event_name": event.event_name,
+        "position": event.position,
+        "water_cost": event.water_cost,
+        "effect": event.effect
+    }
+
+
+def serialize_game(game):
+    board_state = game.board_state
+    return {
+        "id": game.id,
+        "player1_name": game.player1_name,
+        "player2_name": game.player2_name,
+        "status": game.status,
+        "winner": game.winner,
+        "version": board_state.version,
+        "board_state": {
+            "player1_water": board_state.player1_water,
+            "player2_water": board_state.player2_water,
+            "player1_camps": board_state.player1_camps,
+            "player2_camps": board_state.player2_camps,
+            "player1_columns": board_state.player1_columns,
+            "player2_columns": board_state.player2_columns,
+            "current_player": board_state.current_player,
+            "turn_number": board_state.turn_number
+        },
+        "events": [serialize_event(event) for event in game.events]
+    }
+
+
+def load_game(game_id):
+    """Load a game with its board and event queue in a single joined query."""
+    return db.session.scalars(
+        select(Game)
+        .options(joinedload(Game.board_state), joinedload(Game.events))
+        .where(Game.id == game_id)
+    ).unique().first()
+
+
+class GameStateCache:
+    """Per-worker LRU of encoded game bodies keyed by game id.
+
+    Entries carry the board version they were built from. Every write bumps
+    that version in the database, so a cached body is only served after a
+    one-column version lookup confirms it, which keeps workers consistent.
+    """
+
+    def __init__(self, max_size=MAX_CACHED_GAMES):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, game_id, version):
+        with self._lock:
+            entry = self._entries.get(game_id)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(game_id)
+            return entry[1]
+
+    def packed(self, game_id, version, body):
+        """msgpack form of a cached body, converted once and kept beside it."""
+        with self._lock:
+            entry = self._entries.get(game_id)
+            if entry is not None and entry[0] == version and entry[2] is not None:
+                return entry[2]
+        packed = json_provider.repack(body)
+        with self._lock:
+            entry = self._entries.get(game_id)
+            if entry is not None and entry[0] == version:
+                self._entries[game_id] = (version, entry[1], packed)
+        return packed
+
+    def put(self, game_id, version, body):
+        with self._lock:
+            self._entries[game_id] = (version, body, None)
+            self._entries.move_to_end(game_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, game_id):
+        with self._lock:
+            self._entries.pop(game_id, None)
+
+
+cache = GameStateCache()
+
+
+def invalidate(game_id):
+    cache.invalidate(game_id)
+
+
+def current_version(game_id):
+    version = db.session.scalar(select(BoardState.version).where(BoardState.game_id == game_id))
+    if version is None:
+        version = archive.archived_version(game_id)
+    return version
+
+
+def game_body(game_id, version=None):
+    """Return ``(version, encoded body)`` for a game, hydrating it on a cache miss."""
+    if version is None:
+        version = current_version(game_id)
+        if version is None:
+            abort(404)
+
+    body = cache.get(game_id, version)
+    if body is None:
+        game = load_game(game_id)
+        if game is None:
+            abort(404)
+        if game.board_state is not None:
+            version = game.board_state.version
+            data = serialize_game(game)
+        else:
+            archived = archive.load(game_id)
+            if archived is None:
+                abort(404)
+            version = archived["version"]
+            data = archive.serialize_archived(game, archived)
+        body = (current_app.json.dumps(data) + "\n").encode("utf-8")
+        cache.put(game_id, version, body)
+    return version, body
+
+
+def game_response(game_id):
+    """Conditional GET response for a game, served from the cache when it is current."""
+    version = current_version(game_id)
+    if version is None:
+        abort(404)
+
+    packed = json_provider.wants_msgpack()
+    suffix = json_provider.MSGPACK_ETAG_SUFFIX if packed else ''
+    if f"{version}{suffix}" in request.if_none_match:
+        response = current_app.response_class(status=304)
+        response.set_etag(f"{version}{suffix}")
+        return response
+
+    version, body = game_body(game_id, version)
+    if packed:
+        body = cache.packed(game_id, version, body)
+    response = current_app.response_class(body, mimetype=json_provider.MSGPACK_MIMETYPE if packed else 'application/json')
+    response.set_etag(f"{version}{suffix}")
+    response.cache_control.no_cache = True
+    if json_provider.msgpack is not None:
+        response.vary.add('Accept')
+    return response
@@ -0,0 +1,271 @@
+"""NDJSON export and import of whole games.
+
+Each line is one game in the ``get_game`` shape. Its ``board_state`` is
+extended with the decks, hands, discards and start player, plus the finish
+details, so a line holds everything needed to recreate the game. Imported
+games get new ids; their board version is kept and a snapshot at that
+version starts their history.
+"""
+import time
+import zlib
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from backend import archive, db, stats
+from backend.action_log import snapshot_row
+from backend.game_state import serialize_event
+from backend.models import BoardState, Game, GameEvent, GameSnapshot, CARD_LIST_FIELDS, pack_card_ids
+
+EXPORT_BATCH_SIZE = 500
+IMPORT_CHUNK_SIZE = 1000
+GZIP_LEVEL = 6
+
+BOARD_FIELDS = (
+    'player1_water', 'player2_water',
+    'player1_camps', 'player2_camps',
+    'player1_columns', 'player2_columns',
+) + CARD_LIST_FIELDS + ('start_player', 'current_player', 'turn_number')
+
+
+def _timestamp(value):
+    return value.isoformat() if value is not None else None
+
+
+def export_record(game, board_state, events, archived=None):
+    """Export line for a live game, or for an archived one from its decoded archive."""
+    if board_state is not None:
+        board = {field: getattr(board_state, field) for field in BOARD_FIELDS}
+        version = board_state.version
+        events = [serialize_event(event) for event in events]
+    elif archived is None:
+        return None
+    else:
+        state = archived["state"]
+        board = {field: state.get(field) for field in BOARD_FIELDS}
+        version = archived["version"]
+        events = state["events"]
+
+    return {
+        "id": game.id,
+        "player1_name": game.player1_name,
+        "player2_name": game.player2_name,
+        "status": game.status,
+        "winner": game.winner,
+        "created_at": _timestamp(game.created_at),
+        "finished_at": _timestamp(game.finished_at),
+        "version": version,
+        "board_state": board,
+        "events": events
+    }
+
+
+def iter_export(after=0, limit=None):
+    """Yield encoded NDJSON lines for games with ids above ``after``, in id order.
+
+    Rows are streamed with ``yield_per``; each batch costs one extra query
+    for its events and one for any archived games, and is dropped from the
+    session before the next batch so memory stays flat.
+    """
+    stmt = (
+        select(Game, BoardState)
+        .outerjoin(BoardState, BoardState.game_id == Game.id)
+        .where(Game.id > after)
+        .order_by(Game.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    if limit is not None:
+        stmt = stmt.limit(limit)
+
+    encode = current_app.json.dumps_bytes
+    result = db.session.execute(stmt)
+    for rows in result.partitions():
+        game_ids = [game.id for game, _ in rows]
+        events = {}
+        loaded = [instance for row in rows for instance in row if instance is not None]
+        for event in db.session.scalars(
+            select(GameEvent).where(GameEvent.game_id.in_(game_ids)).order_by(GameEvent.position, GameEvent.id)
+        ):
+            events.setdefault(event.game_id, []).append(event)
+            loaded.append(event)
+        archived = archive.load_many([game.id for game, board_state in rows if board_state is None])
+
+        lines = []
+        for game, board_state in rows:
+            record = export_record(game, board_state, events.get(game.id, ()), archived.get(game.id))
+            if record is not None:
+                lines.append(encode(record))
+        for instance in loaded:
+            db.session.expunge(instance)
+        if lines:
+            yield b"\n".join(lines) + b"\n"
+
+
+def gzip_stream(chunks, level=GZIP_LEVEL):
+    """Gzip a stream of byte chunks, flushing after each so clients see whole lines promptly."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _datetime(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def import_rows(record):
+    """Split one export line into Game values, BoardState values and event values."""
+    if not isinstance(record.get("board_state"), dict):
+        raise ValueError("Game is missing its board_state")
+    board = record["board_state"]
+    game_values = {
+        "player1_name": record.get("player1_name") or 'Player 1',
+        "player2_name": record.get("player2_name") or 'Player 2',
+        "status": record.get("status") or 'active',
+        "winner": record.get("winner"),
+        "created_at": _datetime(record.get("created_at")) or datetime.utcnow(),
+        "finished_at": _datetime(record.get("finished_at"))
+    }
+    board_values = {
+        "player1_water": board.get("player1_water", 3),
+        "player2_water": board.get("player2_water", 3),
+        "player1_columns": board.get("player1_columns") or [[], [], []],
+        "player2_columns": board.get("player2_columns") or [[], [], []],
+        "start_player": board.get("start_player") or 1,
+        "current_player": board.get("current_player") or 1,
+        "turn_number": board.get("turn_number") or 1,
+        "version": record.get("version") or 1
+    }
+    for field in ('player1_camps', 'player2_camps') + CARD_LIST_FIELDS:
+        board_values[field] = board.get(field) or []
+    for field in CARD_LIST_FIELDS:
+        try:
+            pack_card_ids(board_values[field])
+        except ValueError as error:
+            raise ValueError(f"{field}: {error}") from None
+    events = [
+        {
+            "player": event["player"],
+            "event_name": event["event_name"],
+            "position": event["position"],
+            "water_cost": event.get("water_cost", 0),
+            "effect": event.get("effect", '')
+        }
+        for event in record.get("events") or []
+    ]
+    return game_values, board_values, events
+
+
+def _insert_chunk(chunk):
+    """Insert one chunk of parsed games with one executemany per table; returns the new game ids."""
+    game_ids = db.session.scalars(
+        insert(Game).returning(Game.id, sort_by_parameter_order=True),
+        [game_values for game_values, _, _ in chunk]
+    ).all()
+    if any(game_values["status"] == 'finished' for game_values, _, _ in chunk):
+        # They keep their finished_at, which warm workers' stats have already passed.
+        stats.bump_stats_version()
+    # A table insert, since the ORM bulk insert would reset the version counter.
+    db.session.execute(insert(BoardState.__table__), [
+        BoardState.storage_values(dict(board_values, game_id=game_id))
+        for game_id, (_, board_values, _) in zip(game_ids, chunk)
+    ])
+
+    event_rows = [
+        dict(event, game_id=game_id)
+        for game_id, (_, _, events) in zip(game_ids, chunk)
+        for event in events
+    ]
+    event_ids = db.session.scalars(
+        insert(GameEvent).returning(GameEvent.id, sort_by_parameter_order=True), event_rows
+    ).all() if event_rows else []
+    events_by_game = {}
+    for event_id, event in zip(event_ids, event_rows):
+        events_by_game.setdefault(event["game_id"], []).append(dict(event, id=event_id))
+
+    snapshots = []
+    for game_id, (_, board_values, _) in zip(game_ids, chunk):
+        state = {field: value for field, value in board_values.items() if field != 'version'}
+        state["events"] = [
+            {key: event[key] for key in ('id', 'player', 'event_name', 'position', 'water_cost', 'effect')}
+            for event in events_by_game.get(game_id, [])
+        ]
+        snapshots.append(snapshot_row(game_id, board_values["version"], state))
+    db.session.execute(insert(GameSnapshot), snapshots)
+    return game_ids
+
+
+def iter_ndjson_lines(stream):
+    """Yield ``(line_number, text)`` for the non-blank lines of a text stream, counting from 1."""
+    for number, text in enumerate(stream, start=1):
+        if text.strip():
+            yield number, text
+
+
+def import_games(stream, chunk_size=IMPORT_CHUNK_SIZE):
+    """Import an NDJSON stream of exported games, committing after every chunk.
+
+    Yields a progress dict after each committed chunk and a final one with
+    ``done`` set. A bad line stops the import with an ``error`` entry that
+    names its line number (from 1), or the first line of the chunk whose
+    insert failed. Chunks committed before it stay imported, and
+    ``source_last_id`` tells the client where to resume.
+    """
+    started = time.perf_counter()
+    loads = current_app.json.loads
+    progress = {"imported": 0, "source_last_id": None}
+    chunk = []
+    chunk_line = None
+    chunk_last_id = None
+    lines = iter_ndjson_lines(stream)
+    line = 1
+
+    try:
+        while True:
+            number, text = next(lines, (None, None))
+            if text is not None:
+                line = number
+                record = loads(text)
+                if not isinstance(record, dict):
+                    raise ValueError(f"Expected a JSON object, got {type(record).__name__}")
+                if not chunk:
+                    chunk_line = number
+                chunk.append(import_rows(record))
+                chunk_last_id = record.get("id")
+            if chunk and (text is None or len(chunk) >= chunk_size):
+                line = chunk_line
+                game_ids = _insert_chunk(chunk)
+                db.session.commit()
+                progress = {
+                    "imported": progress["imported"] + len(game_ids),
+                    "first_id": game_ids[0],
+                    "last_id": game_ids[-1],
+                    "source_last_id": chunk_last_id
+                }
+                chunk = []
+                yield progress
+            if text is None:
+                break
+            # A line that cannot be read or decoded fails inside next(); blame the one after.
+            line = number + 1
+    except (ValueError, KeyError, TypeError, EOFError, OSError, SQLAlchemyError) as error:
+        db.session.rollback()
+        message = f"Missing field {error}" if isinstance(error, KeyError) else str(error).splitlines()[0]
+        yield {
+            "error": message,
+            "line": line,
+            "imported": progress["imported"],
+            "source_last_id": progress["source_last_id"]
+        }
+        return
+
+    yield {
+        "done": True,
+        "imported": progress["imported"],
+        "source_last_id": progress["source_last_id"],
+        "seconds": round(time.perf_counter() - started, 3)
+    }
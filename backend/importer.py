@@ -0,0 +1,109 @@
+import csv
+import json
+import os
+
+import click
+
+from backend import db
+from backend import catalog
+from backend.search import rebuild_search_index
+from backend.seeds import upsert_cards
+
+READ_SIZE = 64 * 1024
+DEFAULT_CHUNK_SIZE = 500
+
+JSON_FIELDS = ("abilities", "traits")
+INT_FIELDS = ("water_cost", "bomb_position", "initial_draw")
+_SEPARATORS = ' \t\r\n,[]'
+
+
+def iter_json_objects(stream, read_size=READ_SIZE):
+    """Yield objects from a JSON array or NDJSON text stream without loading it whole."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    while True:
+        while pos < len(buffer) and buffer[pos] in _SEPARATORS:
+            pos += 1
+        if pos == len(buffer):
+            buffer = stream.read(read_size)
+            pos = 0
+            if not buffer:
+                return
+            continue
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            chunk = stream.read(read_size)
+            if not chunk:
+                raise
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        if not isinstance(item, dict):
+            raise ValueError(f"Expected a JSON object, got {type(item).__name__}")
+        yield item
+        pos = end
+
+
+def iter_csv_cards(stream):
+    """Yield card objects from CSV rows; list columns hold JSON arrays."""
+    for row in csv.DictReader(stream):
+        card = {key: (value if value != '' else None) for key, value in row.items() if key}
+        for field in JSON_FIELDS:
+            if card.get(field) is not None:
+                card[field] = json.loads(card[field])
+        for field in INT_FIELDS:
+            if card.get(field) is not None:
+                card[field] = int(card[field])
+        yield card
+
+
+def iter_cards(stream, fmt):
+    if fmt == 'csv':
+        return iter_csv_cards(stream)
+    if fmt in ('json', 'ndjson'):
+        return iter_json_objects(stream)
+    raise ValueError(f"Unsupported card file format: {fmt}")
+
+
+def import_cards(stream, fmt='json', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Upsert cards from a text stream, committing one chunk at a time."""
+    totals = {"added": 0, "updated": 0, "total": 0}
+    chunk = []
+
+    def flush():
+        result = upsert_cards(chunk)
+        db.session.commit()
+        for key in totals:
+            totals[key] += result[key]
+        chunk.clear()
+
+    for card in iter_cards(stream, fmt):
+        chunk.append(card)
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+
+    catalog.refresh()
+    rebuild_search_index()
+    return totals
+
+
+def import_cards_file(path, fmt=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+    with open(path, encoding='utf-8', newline='') as stream:
+        return import_cards(stream, fmt, chunk_size)
+
+
+@click.command('import-cards')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['json', 'ndjson', 'csv']),
+              help="File format; defaults to the file extension.")
+@click.option('--chunk-size', default=DEFAULT_CHUNK_SIZE, show_default=True)
+def import_cards_command(path, fmt, chunk_size):
+    """Import or update cards from a JSON, NDJSON or CSV file."""
+    result = import_cards_file(path, fmt, chunk_size)
+    click.echo(f"Imported {result['total']} cards "
+               f"({result['added']} added, {result['updated']} updated)")
@@ -0,0 +1,93 @@
+"""Flask JSON provider with an orjson fast path and msgpack negotiation.
+
+orjson and msgpack are optional. Without orjson the provider encodes like
+Flask's default one; without msgpack every response is JSON. Output keeps
+Flask's conventions (sorted keys, HTTP dates, compact unless debugging),
+except that orjson writes non-ASCII characters as UTF-8 instead of escapes.
+
+Clients that send ``Accept: application/msgpack`` get msgpack bodies.
+Routes that cache encoded JSON (the catalog, game states) convert it once
+with ``repack`` and keep both, so ``wants_msgpack`` picks between them.
+"""
+from flask import current_app, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_MIMETYPE = 'application/msgpack'
+MSGPACK_ETAG_SUFFIX = '-mp'
+
+_COMPACT = {'separators': (',', ':')}
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def wants_msgpack():
+    """True when msgpack is installed and the client prefers it over JSON."""
+    if msgpack is None or not request:
+        return False
+    return request.accept_mimetypes.best_match(('application/json', MSGPACK_MIMETYPE)) == MSGPACK_MIMETYPE
+
+
+def repack(body):
+    """msgpack encoding of an already encoded JSON body."""
+    provider = current_app.json
+    return provider.packb(provider.loads(body))
+
+
+def strip_etag_suffix(etag):
+    """The JSON ETag a msgpack ETag was derived from."""
+    return etag[:-len(MSGPACK_ETAG_SUFFIX)] if etag.endswith(MSGPACK_ETAG_SUFFIX) else etag
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    def _orjson(self, obj):
+        try:
+            return orjson.dumps(obj, default=self.default, option=_ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # Integers over 64 bits and other values orjson refuses; the stdlib handles them.
+            return None
+
+    def dumps_bytes(self, obj):
+        """Compact UTF-8 JSON for ``obj``, without a str round trip when orjson is installed."""
+        if orjson is not None:
+            body = self._orjson(obj)
+            if body is not None:
+                return body
+        return super().dumps(obj, **_COMPACT).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and (not kwargs or kwargs == _COMPACT):
+            body = self._orjson(obj)
+            if body is not None:
+                return body.decode('utf-8')
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def packb(self, obj):
+        return msgpack.packb(obj, default=self.default, use_bin_type=True)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if wants_msgpack():
+            response = self._app.response_class(self.packb(obj), mimetype=MSGPACK_MIMETYPE)
+        elif (self.compact is None and self._app.debug) or self.compact is False:
+            response = super().response(obj)
+        else:
+            response = self._app.response_class(self.dumps_bytes(obj) + b"\n", mimetype=self.mimetype)
+        if msgpack is not None:
+            response.vary.add('Accept')
+        return response
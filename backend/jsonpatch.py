@@ -0,0 +1,129 @@
+"""Minimal RFC 6902 JSON Patch support for board state documents."""
+import copy
+
+
+class JsonPatchError(ValueError):
+    pass
+
+
+class JsonPatchTestFailed(JsonPatchError):
+    pass
+
+
+def parse_pointer(path):
+    if not isinstance(path, str) or not path.startswith('/'):
+        raise JsonPatchError(f"Invalid JSON pointer: {path!r}")
+    return [token.replace('~1', '/').replace('~0', '~') for token in path[1:].split('/')]
+
+
+def pointer_roots(operations):
+    """Top-level document keys read or written by ``operations``."""
+    roots = set()
+    for operation in operations:
+        if not isinstance(operation, dict):
+            raise JsonPatchError("Each patch operation must be an object")
+        for key in ('path', 'from'):
+            if key in operation:
+                roots.add(parse_pointer(operation[key])[0])
+    return roots
+
+
+def _index(container, token, allow_end=False):
+    if allow_end and token == '-':
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token[0] == '0'):
+        raise JsonPatchError(f"Invalid list index: {token!r}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise JsonPatchError(f"List index out of range: {index}")
+    return index
+
+
+def _parent(document, tokens):
+    target = document
+    for token in tokens[:-1]:
+        if isinstance(target, list):
+            target = target[_index(target, token)]
+        elif isinstance(target, dict) and token in target:
+            target = target[token]
+        else:
+            raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+    if not isinstance(target, (list, dict)):
+        raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+    return target, tokens[-1]
+
+
+def _get(document, tokens):
+    parent, key = _parent(document, tokens)
+    if isinstance(parent, list):
+        return parent[_index(parent, key)]
+    if key not in parent:
+        raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+    return parent[key]
+
+
+def _add(document, tokens, value):
+    parent, key = _parent(document, tokens)
+    if isinstance(parent, list):
+        parent.insert(_index(parent, key, allow_end=True), value)
+    else:
+        parent[key] = value
+
+
+def _remove(document, tokens):
+    parent, key = _parent(document, tokens)
+    if isinstance(parent, list):
+        return parent.pop(_index(parent, key))
+    if key not in parent:
+        raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+    return parent.pop(key)
+
+
+def apply_patch(document, operations):
+    """Apply ``operations`` to ``document`` in place and return the changed paths.
+
+    Whole top-level members may be replaced but never added or removed, so
+    the document keeps the fields it was loaded with.
+    """
+    changed = []
+    for operation in operations:
+        op = operation.get('op')
+        path = operation.get('path')
+        tokens = parse_pointer(path)
+        if tokens[0] not in document:
+            raise JsonPatchError(f"Unknown board field: {tokens[0]!r}")
+        if len(tokens) == 1 and op not in ('replace', 'test'):
+            raise JsonPatchError(f"Cannot {op} a whole board field")
+
+        if op == 'test':
+            if _get(document, tokens) != operation.get('value'):
+                raise JsonPatchTestFailed(f"Test failed at {path}")
+            continue
+
+        if op in ('add', 'replace'):
+            if 'value' not in operation:
+                raise JsonPatchError(f"Missing value for {op} at {path}")
+            if op == 'replace':
+                _get(document, tokens)
+                if len(tokens) > 1:
+                    _remove(document, tokens)
+            _add(document, tokens, copy.deepcopy(operation['value']))
+        elif op == 'remove':
+            _remove(document, tokens)
+        elif op in ('move', 'copy'):
+            source = operation.get('from')
+            source_tokens = parse_pointer(source)
+            if source_tokens[0] not in document or len(source_tokens) == 1:
+                raise JsonPatchError(f"Invalid from path: {source!r}")
+            if op == 'move':
+                if tokens[:len(source_tokens)] == source_tokens and tokens != source_tokens:
+                    raise JsonPatchError(f"Cannot move {source} into itself")
+                value = _remove(document, source_tokens)
+                changed.append(source)
+            else:
+                value = copy.deepcopy(_get(document, source_tokens))
+            _add(document, tokens, value)
+        else:
+            raise JsonPatchError(f"Unsupported patch operation: {op!r}")
+        changed.append(path)
+    return changed
@@ -0,0 +1,291 @@
+"""Per-endpoint request metrics in the Prometheus text format.
+
+``instrument`` hooks a blueprint so every request records its latency,
+response size, status and the SQL statements it ran. ``render`` produces
+the exposition text served at GET /api/metrics.
+
+Each thread writes to its own shard, so recording takes no lock. Shards
+live in memory unless ``PROMETHEUS_MULTIPROC_DIR`` is set. In that case
+each shard is a memory-mapped file in that directory, and a scrape sums
+the files of every gunicorn worker. gunicorn.conf.py points the variable
+at a scratch directory and empties it when the server starts. Files of
+workers that exit are kept, so counters never go backwards.
+"""
+import glob
+import mmap
+import os
+import struct
+import threading
+import time
+from bisect import bisect_left
+
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+MULTIPROC_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SIZE_BUCKETS = (128, 512, 2048, 8192, 32768, 131072, 524288, 2097152)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34)
+
+REQUESTS = 'radlands_http_requests_total'
+LATENCY = 'radlands_http_request_duration_seconds'
+SIZE = 'radlands_http_response_size_bytes'
+STATEMENTS = 'radlands_db_statements_per_request'
+DB_TIME = 'radlands_db_statement_duration_seconds_total'
+
+# name -> (type, help, buckets), in exposition order
+FAMILIES = {
+    REQUESTS: ('counter', "Requests by endpoint, method and status.", None),
+    LATENCY: ('histogram', "Time to build the response, by endpoint.", LATENCY_BUCKETS),
+    SIZE: ('histogram', "Response body size, by endpoint; streamed bodies are not counted.", SIZE_BUCKETS),
+    STATEMENTS: ('histogram', "SQL statements executed per request, by endpoint.", STATEMENT_BUCKETS),
+    DB_TIME: ('counter', "Time spent executing SQL statements, by endpoint.", None),
+}
+
+_HEADER = struct.Struct('<Q')
+_KEY_LENGTH = struct.Struct('<I')
+_VALUE = struct.Struct('<d')
+_INITIAL_SIZE = 64 * 1024
+
+
+def _pad(length):
+    return (length + 7) & ~7
+
+
+class Shard:
+    """Series values written by one thread.
+
+    The buffer starts with the number of bytes in use, then holds entries of
+    a length-prefixed key padded to 8 bytes and a float64 value. Only the
+    owning thread writes; a new entry is complete before the used length
+    grows past it, so readers in other processes never see half of one.
+    """
+
+    def __init__(self, path=None):
+        self.pid = os.getpid()
+        self.path = path
+        self._offsets = {}
+        self._values = {}
+        self._used = _HEADER.size
+        if path is None:
+            self._file = None
+            self._buffer = bytearray(_INITIAL_SIZE)
+        else:
+            self._file = open(path, 'w+b')
+            self._file.truncate(_INITIAL_SIZE)
+            self._buffer = mmap.mmap(self._file.fileno(), _INITIAL_SIZE)
+        _HEADER.pack_into(self._buffer, 0, self._used)
+
+    def _grow(self, needed):
+        size = len(self._buffer)
+        while size < needed:
+            size *= 2
+        if self._file is None:
+            self._buffer.extend(bytes(size - len(self._buffer)))
+        else:
+            self._buffer.close()
+            self._file.truncate(size)
+            self._buffer = mmap.mmap(self._file.fileno(), size)
+
+    def _add_key(self, key):
+        encoded = key.encode('utf-8')
+        start = self._used
+        value_offset = start + _pad(_KEY_LENGTH.size + len(encoded))
+        end = value_offset + _VALUE.size
+        if end > len(self._buffer):
+            self._grow(end)
+        _KEY_LENGTH.pack_into(self._buffer, start, len(encoded))
+        self._buffer[start + _KEY_LENGTH.size:start + _KEY_LENGTH.size + len(encoded)] = encoded
+        _VALUE.pack_into(self._buffer, value_offset, 0.0)
+        self._used = end
+        _HEADER.pack_into(self._buffer, 0, end)
+        self._offsets[key] = value_offset
+        self._values[key] = 0.0
+        return value_offset
+
+    def inc(self, key, amount=1.0):
+        offset = self._offsets.get(key)
+        if offset is None:
+            offset = self._add_key(key)
+        value = self._values[key] + amount
+        self._values[key] = value
+        _VALUE.pack_into(self._buffer, offset, value)
+
+    def items(self):
+        return list(self._values.items())
+
+
+def read_shard(data):
+    """``(key, value)`` pairs of a shard file's bytes."""
+    if len(data) < _HEADER.size:
+        return
+    used = min(_HEADER.unpack_from(data, 0)[0], len(data))
+    offset = _HEADER.size
+    while offset + _KEY_LENGTH.size <= used:
+        length = _KEY_LENGTH.unpack_from(data, offset)[0]
+        key = bytes(data[offset + _KEY_LENGTH.size:offset + _KEY_LENGTH.size + length]).decode('utf-8')
+        value_offset = offset + _pad(_KEY_LENGTH.size + length)
+        if value_offset + _VALUE.size > used:
+            return
+        yield key, _VALUE.unpack_from(data, value_offset)[0]
+        offset = value_offset + _VALUE.size
+
+
+_local = threading.local()
+# (pid, thread ident) -> Shard
+_shards = {}
+_shards_lock = threading.Lock()
+
+
+def _shard():
+    shard = getattr(_local, 'shard', None)
+    if shard is None or shard.pid != os.getpid():
+        shard = _local.shard = _thread_shard()
+    return shard
+
+
+def _thread_shard():
+    # Only this lookup locks, once per thread; recording never does. An ident
+    # is reused only after its thread has exited, so the new thread can take
+    # over the finished one's shard and the number of shards stays bounded.
+    key = (os.getpid(), threading.get_ident())
+    with _shards_lock:
+        shard = _shards.get(key)
+        if shard is None:
+            path = None
+            if MULTIPROC_DIR:
+                os.makedirs(MULTIPROC_DIR, exist_ok=True)
+                path = os.path.join(MULTIPROC_DIR, f"{key[0]}-{key[1]}.bin")
+            shard = _shards[key] = Shard(path)
+    return shard
+
+
+def _key(name, labels, le=''):
+    # name, label text and bucket bound, tab-separated; see render()
+    return f"{name}\t{labels}\t{le}"
+
+
+def _observe(shard, name, labels, buckets, value):
+    index = bisect_left(buckets, value)
+    shard.inc(_key(f"{name}_bucket", labels, repr(buckets[index]) if index < len(buckets) else '+Inf'))
+    shard.inc(_key(f"{name}_sum", labels), value)
+
+
+def record(endpoint, method, status, seconds, size, statements, statement_seconds):
+    shard = _shard()
+    labels = f'endpoint="{endpoint}"'
+    shard.inc(_key(REQUESTS, f'{labels},method="{method}",status="{status}"'))
+    _observe(shard, LATENCY, labels, LATENCY_BUCKETS, seconds)
+    if size is not None:
+        _observe(shard, SIZE, labels, SIZE_BUCKETS, size)
+    _observe(shard, STATEMENTS, labels, STATEMENT_BUCKETS, statements)
+    if statement_seconds:
+        shard.inc(_key(DB_TIME, labels), statement_seconds)
+
+
+def collect():
+    """Totals of every series over all shards, across workers when a multiprocess directory is set."""
+    totals = {}
+    if MULTIPROC_DIR:
+        for path in glob.glob(os.path.join(MULTIPROC_DIR, '*.bin')):
+            try:
+                with open(path, 'rb') as stream:
+                    items = list(read_shard(stream.read()))
+            except OSError:
+                continue
+            for key, value in items:
+                totals[key] = totals.get(key, 0.0) + value
+    else:
+        pid = os.getpid()
+        with _shards_lock:
+            shards = [shard for (shard_pid, _), shard in _shards.items() if shard_pid == pid]
+        for shard in shards:
+            for key, value in shard.items():
+                totals[key] = totals.get(key, 0.0) + value
+    return totals
+
+
+def _number(value):
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+def render():
+    """Prometheus text exposition of all recorded metrics."""
+    series = {}
+    for key, value in collect().items():
+        name, labels, le = key.split('\t')
+        series.setdefault(name, {})[(labels, le)] = value
+
+    lines = []
+    for name, (kind, help_text, buckets) in FAMILIES.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == 'counter':
+            for (labels, _), value in sorted(series.get(name, {}).items()):
+                lines.append(f"{name}{{{labels}}} {_number(value)}")
+            continue
+
+        counts = {}
+        for (labels, le), value in series.get(f"{name}_bucket", {}).items():
+            counts.setdefault(labels, {})[le] = value
+        sums = {labels: value for (labels, _), value in series.get(f"{name}_sum", {}).items()}
+        bounds = [repr(bound) for bound in buckets] + ['+Inf']
+        for labels in sorted(counts):
+            cumulative = 0.0
+            for le in bounds:
+                cumulative += counts[labels].get(le, 0.0)
+                lines.append(f'{name}_bucket{{{labels},le="{le}"}} {_number(cumulative)}')
+            lines.append(f"{name}_sum{{{labels}}} {_number(sums.get(labels, 0.0))}")
+            lines.append(f"{name}_count{{{labels}}} {_number(cumulative)}")
+    return "\n".join(lines) + "\n"
+
+
+class _RequestStats:
+    __slots__ = ('started', 'statements', 'statement_seconds', 'statement_started')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.statement_seconds = 0.0
+        self.statement_started = None
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(*args):
+    stats = getattr(_local, 'request', None)
+    if stats is not None:
+        stats.statements += 1
+        stats.statement_started = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(*args):
+    stats = getattr(_local, 'request', None)
+    if stats is not None and stats.statement_started is not None:
+        stats.statement_seconds += time.perf_counter() - stats.statement_started
+        stats.statement_started = None
+
+
+def instrument(blueprint):
+    """Record metrics for every request the blueprint handles."""
+
+    @blueprint.before_request
+    def start_request_metrics():
+        _local.request = _RequestStats()
+
+    @blueprint.teardown_request
+    def clear_request_metrics(exception=None):
+        _local.request = None
+
+    @blueprint.after_request
+    def record_request_metrics(response):
+        stats = getattr(_local, 'request', None)
+        if stats is None:
+            return response
+        # Streamed bodies (SSE, export, import) have no length and are timed to the start of the stream.
+        record(request.endpoint, request.method, response.status_code, time.perf_counter() - stats.started,
+               response.content_length, stats.statements, stats.statement_seconds)
+        return response
@@ -1,6 +1,63 @@
 from backend import db
+from array import array
 from datetime import datetime
-from sqlalchemy.dialects.postgresql import JSON
+from sqlalchemy import JSON
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.hybrid import hybrid_property
+import sys
+
+def json_type(none_as_null=False):
+    """JSONB on Postgres so documents can be indexed and queried by containment, JSON elsewhere."""
+    return JSON(none_as_null=none_as_null).with_variant(JSONB(none_as_null=none_as_null), 'postgresql')
+
+CARD_LIST_FIELDS = (
+    'player1_deck', 'player2_deck',
+    'player1_hand', 'player2_hand',
+    'player1_discard', 'player2_discard'
+)
+
+# Largest card id the packed uint16 columns can hold
+MAX_CARD_ID = 0xFFFF
+
+def pack_card_ids(card_ids):
+    """Encode card ids as a little-endian uint16 array.
+    
+    Raises ValueError for anything that is not an integer from 0 to MAX_CARD_ID.
+    """
+    try:
+        packed = array('H', card_ids)
+    except (OverflowError, TypeError):
+        raise ValueError(f"Card ids must be integers from 0 to {MAX_CARD_ID}") from None
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+def unpack_card_ids(data):
+    card_ids = array('H')
+    card_ids.frombytes(data)
+    if sys.byteorder == 'big':
+        card_ids.byteswap()
+    return card_ids.tolist()
+
+def _card_id_list(field):
+    """Expose a packed card id column as a list, reading legacy JSON rows until rewritten."""
+    packed = f'{field}_packed'
+    legacy = f'_{field}_json'
+    
+    def getter(self):
+        data = getattr(self, packed)
+        if data is not None:
+            return unpack_card_ids(data)
+        return list(getattr(self, legacy) or [])
+    
+    def setter(self, card_ids):
+        setattr(self, packed, pack_card_ids(card_ids))
+        setattr(self, legacy, None)
+    
+    def expression(cls):
+        return getattr(cls, packed)
+    
+    return hybrid_property(getter, setter, expr=expression)
 
 class Game(db.Model):
     __tablename__ = 'games'
@@ -9,11 +66,13 @@ class Game(db.Model):
     player1_name = db.Column(db.String(100), nullable=False)
     player2_name = db.Column(db.String(100), nullable=False)
     status = db.Column(db.String(20), default='active')
+    winner = db.Column(db.Integer)
+    finished_at = db.Column(db.DateTime, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     board_state = db.relationship('BoardState', backref='game', uselist=False, cascade='all, delete-orphan')
-    events = db.relationship('GameEvent', backref='game', cascade='all, delete-orphan')
+    events = db.relationship('GameEvent', backref='game', cascade='all, delete-orphan', order_by='GameEvent.position')
 
 class BoardState(db.Model):
     __tablename__ = 'board_states'
@@ -24,27 +83,60 @@ class BoardState(db.Model):
     player1_water = db.Column(db.Integer, default=3)
     player2_water = db.Column(db.Integer, default=3)
     
-    player1_camps = db.Column(JSON, default=list)
-    player2_camps = db.Column(JSON, default=list)
-    
-    player1_columns = db.Column(JSON, default=list)
-    player2_columns = db.Column(JSON, default=list)
-    
-    player1_deck = db.Column(JSON, default=list)
-    player2_deck = db.Column(JSON, default=list)
-    
-    player1_hand = db.Column(JSON, default=list)
-    player2_hand = db.Column(JSON, default=list)
-    
-    player1_discard = db.Column(JSON, default=list)
-    player2_discard = db.Column(JSON, default=list)
+    player1_camps = db.Column(json_type(), default=list)
+    player2_camps = db.Column(json_type(), default=list)
+    
+    player1_columns = db.Column(json_type(), default=list)
+    player2_columns = db.Column(json_type(), default=list)
+    
+    # Decks, hands and discards are packed uint16 card ids; the JSON columns
+    # only hold rows written before the packed format. They are cleared on
+    # write and by setup-db (schema.migrate_card_lists).
+    player1_deck_packed = db.Column(db.LargeBinary)
+    player2_deck_packed = db.Column(db.LargeBinary)
+    player1_hand_packed = db.Column(db.LargeBinary)
+    player2_hand_packed = db.Column(db.LargeBinary)
+    player1_discard_packed = db.Column(db.LargeBinary)
+    player2_discard_packed = db.Column(db.LargeBinary)
+    
+    _player1_deck_json = db.Column('player1_deck', json_type(none_as_null=True))
+    _player2_deck_json = db.Column('player2_deck', json_type(none_as_null=True))
+    _player1_hand_json = db.Column('player1_hand', json_type(none_as_null=True))
+    _player2_hand_json = db.Column('player2_hand', json_type(none_as_null=True))
+    _player1_discard_json = db.Column('player1_discard', json_type(none_as_null=True))
+    _player2_discard_json = db.Column('player2_discard', json_type(none_as_null=True))
+    
+    player1_deck = _card_id_list('player1_deck')
+    player2_deck = _card_id_list('player2_deck')
+    player1_hand = _card_id_list('player1_hand')
+    player2_hand = _card_id_list('player2_hand')
+    player1_discard = _card_id_list('player1_discard')
+    player2_discard = _card_id_list('player2_discard')
     
     start_player = db.Column(db.Integer, default=1)
     current_player = db.Column(db.Integer, default=1)
     turn_number = db.Column(db.Integer, default=1)
+    
+    # Bumped by every write to the board, including the single-statement
+    # updates in routes.py; the ORM checks it on flush to catch lost updates.
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    
+    __mapper_args__ = {'version_id_col': version}
+    
+    @staticmethod
+    def storage_values(values):
+        """Map card list fields in ``values`` onto their packed columns for Core inserts."""
+        row = dict(values)
+        for field in CARD_LIST_FIELDS:
+            if field in row:
+                row[f'{field}_packed'] = pack_card_ids(row.pop(field))
+        return row
 
 class GameEvent(db.Model):
     __tablename__ = 'game_events'
+    __table_args__ = (
+        db.Index('ix_game_events_queue', 'game_id', 'player', 'position'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     game_id = db.Column(db.Integer, db.ForeignKey('games.id'), nullable=False)
@@ -59,14 +151,19 @@ class GameEvent(db.Model):
 
 class Card(db.Model):
     __tablename__ = 'cards'
+    __table_args__ = (
+        # Serve containment queries ("cards with trait X"); JSONB only exists on Postgres.
+        db.Index('ix_cards_abilities', 'abilities', postgresql_using='gin').ddl_if(dialect='postgresql'),
+        db.Index('ix_cards_traits', 'traits', postgresql_using='gin').ddl_if(dialect='postgresql'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False, unique=True)
     card_type = db.Column(db.String(20), nullable=False)
     water_cost = db.Column(db.Integer, default=0)
     
-    abilities = db.Column(JSON, default=list)
-    traits = db.Column(JSON, default=list)
+    abilities = db.Column(json_type(), default=list)
+    traits = db.Column(json_type(), default=list)
     junk_effect = db.Column(db.Text)
     
     event_effect = db.Column(db.Text)
@@ -74,3 +171,59 @@ class Card(db.Model):
     initial_draw = db.Column(db.Integer)
     
     expansion = db.Column(db.String(50), default='base')
+
+class CatalogVersion(db.Model):
+    __tablename__ = 'catalog_version'
+    
+    # A single row, bumped whenever the cards table changes, so every worker
+    # can tell that its in-memory catalog snapshot is stale.
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+class StatsVersion(db.Model):
+    __tablename__ = 'stats_version'
+    
+    # A single row, bumped when finished games appear behind the stats
+    # watermark (imports keep their original finished_at), so every worker
+    # rebuilds its totals instead of skipping them.
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+class GameAction(db.Model):
+    __tablename__ = 'game_actions'
+    __table_args__ = (
+        db.UniqueConstraint('game_id', 'seq', name='uq_game_actions_seq'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    game_id = db.Column(db.Integer, db.ForeignKey('games.id'), nullable=False)
+    # Board version produced by the action
+    seq = db.Column(db.Integer, nullable=False)
+    kind = db.Column(db.String(16), nullable=False)
+    payload = db.Column(json_type())
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class GameSnapshot(db.Model):
+    __tablename__ = 'game_snapshots'
+    __table_args__ = (
+        db.UniqueConstraint('game_id', 'seq', name='uq_game_snapshots_seq'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    game_id = db.Column(db.Integer, db.ForeignKey('games.id'), nullable=False)
+    seq = db.Column(db.Integer, nullable=False)
+    state = db.Column(json_type(), nullable=False)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ArchivedGame(db.Model):
+    __tablename__ = 'archived_games'
+    
+    # The games row stays behind; board, events and log live in ``data``.
+    game_id = db.Column(db.Integer, db.ForeignKey('games.id'), primary_key=True)
+    version = db.Column(db.Integer, nullable=False)
+    # zlib-compressed compact JSON, see backend/archive.py
+    data = db.Column(db.LargeBinary, nullable=False)
+    
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
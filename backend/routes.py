@@ -1,134 +1,262 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, url_for, abort, stream_with_context
 from backend import db
-from backend.models import Game, BoardState, GameEvent, Card
-from sqlalchemy import or_
+from backend.models import Game, BoardState, GameEvent, GameSnapshot
+from datetime import datetime
+from backend import action_log, ai, catalog, game_state, game_transfer, json_provider, metrics, stats, stream
+from backend.search import search_cards
+from backend.event_queue import advance_events
+from backend.engine import load_state, validate_board_fields
+from backend.jsonpatch import JsonPatchError, JsonPatchTestFailed, apply_patch, pointer_roots
+from sqlalchemy import case, insert, select, update
+from sqlalchemy.orm import load_only
+from sqlalchemy.orm.exc import StaleDataError
+import copy
+import gzip
+import io
+import random
 
 api_bp = Blueprint('api', __name__)
+metrics.instrument(api_bp)
 
 @api_bp.route('/health', methods=['GET'])
 def health_check():
     return jsonify({"status": "healthy", "message": "Radlands API is running"}), 200
 
-@api_bp.route('/games', methods=['POST'])
-def create_game():
-    import random
-    
-    data = request.json
+@api_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+MAX_BATCH_GAMES = 100
+PATCHABLE_BOARD_FIELDS = ('player1_columns', 'player2_columns', 'player1_camps', 'player2_camps')
+
+def _new_game(data, snapshot):
+    """Build the Game and BoardState column values for a new game request.
     
+    Raises ValueError when the request is malformed.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("A game must be a JSON object")
     player1_camps = data.get('player1_camps', [])
     player2_camps = data.get('player2_camps', [])
     start_player = data.get('start_player', random.choice([1, 2]))
+    expansions = data.get('expansions')
+    
+    for camps in (player1_camps, player2_camps):
+        if not isinstance(camps, list) or not all(isinstance(camp, dict) for camp in camps):
+            raise ValueError("Camps must be a list of card objects")
+    # A bare string would otherwise become a set of its characters and match no expansion.
+    if expansions is not None and (
+        not isinstance(expansions, list) or not all(isinstance(name, str) for name in expansions)
+    ):
+        raise ValueError("expansions must be a list of expansion names")
+    
+    deck_pool = snapshot.deck_pool(expansions)
+    starting_hand = snapshot.starting_hand()
+    player1_deck, player1_hand = catalog.deal(deck_pool, starting_hand, player1_camps)
+    player2_deck, player2_hand = catalog.deal(deck_pool, starting_hand, player2_camps)
+    
+    game_values = {
+        "player1_name": data.get('player1_name', 'Player 1'),
+        "player2_name": data.get('player2_name', 'Player 2'),
+        "status": 'active'
+    }
+    board_values = {
+        "player1_camps": player1_camps,
+        "player2_camps": player2_camps,
+        "player1_columns": [[], [], []],
+        "player2_columns": [[], [], []],
+        "player1_deck": player1_deck,
+        "player2_deck": player2_deck,
+        "player1_hand": player1_hand,
+        "player2_hand": player2_hand,
+        "player1_discard": [],
+        "player2_discard": [],
+        "start_player": start_player,
+        "current_player": start_player
+    }
+    return game_values, board_values
+
+def _created_game_summary(game_id, game_values, board_values):
+    return {
+        "id": game_id,
+        "player1_name": game_values["player1_name"],
+        "player2_name": game_values["player2_name"],
+        "status": game_values["status"],
+        "start_player": board_values["start_player"],
+        "player1_hand_count": len(board_values["player1_hand"]),
+        "player2_hand_count": len(board_values["player2_hand"])
+    }
+
+@api_bp.route('/games', methods=['POST'])
+def create_game():
+    data = request.json
     
-    game = Game(
-        player1_name=data.get('player1_name', 'Player 1'),
-        player2_name=data.get('player2_name', 'Player 2')
-    )
+    try:
+        game_values, board_values = _new_game(data, catalog.get_snapshot())
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+    
+    game = Game(**game_values)
     db.session.add(game)
     db.session.flush()
     
-    people_cards = Card.query.filter_by(card_type='people').all()
-    event_cards = Card.query.filter_by(card_type='event').all()
-    
-    deck_card_ids = [card.id for card in people_cards + event_cards]
-    
-    player1_deck = deck_card_ids.copy()
-    player2_deck = deck_card_ids.copy()
-    random.shuffle(player1_deck)
-    random.shuffle(player2_deck)
-    
-    player1_initial_draw = sum(camp.get('initial_draw', 0) for camp in player1_camps)
-    player2_initial_draw = sum(camp.get('initial_draw', 0) for camp in player2_camps)
-    
-    player1_hand = player1_deck[:player1_initial_draw]
-    player1_deck = player1_deck[player1_initial_draw:]
-    
-    player2_hand = player2_deck[:player2_initial_draw]
-    player2_deck = player2_deck[player2_initial_draw:]
-    
-    raiders_card = Card.query.filter_by(name='Raiders').first()
-    water_silo_card = Card.query.filter_by(name='Water Silo').first()
-    
-    if raiders_card:
-        player1_hand.append(raiders_card.id)
-        player2_hand.append(raiders_card.id)
-    
-    if water_silo_card:
-        player1_hand.append(water_silo_card.id)
-        player2_hand.append(water_silo_card.id)
-    
-    board_state = BoardState(
-        game_id=game.id,
-        player1_camps=player1_camps,
-        player2_camps=player2_camps,
-        player1_columns=[[], [], []],
-        player2_columns=[[], [], []],
-        player1_deck=player1_deck,
-        player2_deck=player2_deck,
-        player1_hand=player1_hand,
-        player2_hand=player2_hand,
-        player1_discard=[],
-        player2_discard=[],
-        start_player=start_player,
-        current_player=start_player
-    )
+    board_state = BoardState(game_id=game.id, **board_values)
     db.session.add(board_state)
+    db.session.add(GameSnapshot(**action_log.snapshot_row(game.id, 1, action_log.initial_state(board_values))))
     db.session.commit()
     
-    return jsonify({
-        "id": game.id,
-        "player1_name": game.player1_name,
-        "player2_name": game.player2_name,
-        "status": game.status,
-        "start_player": start_player,
-        "player1_hand_count": len(player1_hand),
-        "player2_hand_count": len(player2_hand)
-    }), 201
+    return jsonify(_created_game_summary(game.id, game_values, board_values)), 201
+
+@api_bp.route('/games/batch', methods=['POST'])
+def create_games_batch():
+    data = request.json
+    game_requests = data.get('games', []) if isinstance(data, dict) else data
+    
+    if not isinstance(game_requests, list) or not game_requests or len(game_requests) > MAX_BATCH_GAMES:
+        return jsonify({"error": f"Send between 1 and {MAX_BATCH_GAMES} games"}), 400
+    
+    snapshot = catalog.get_snapshot()
+    new_games = []
+    for index, game_data in enumerate(game_requests):
+        try:
+            new_games.append(_new_game(game_data, snapshot))
+        except ValueError as error:
+            return jsonify({"error": f"games[{index}]: {error}"}), 400
+    
+    game_ids = db.session.scalars(
+        insert(Game).returning(Game.id, sort_by_parameter_order=True),
+        [game_values for game_values, _ in new_games]
+    ).all()
+    db.session.execute(insert(BoardState), [
+        BoardState.storage_values(dict(board_values, game_id=game_id))
+        for game_id, (_, board_values) in zip(game_ids, new_games)
+    ])
+    db.session.execute(insert(GameSnapshot), [
+        action_log.snapshot_row(game_id, 1, action_log.initial_state(board_values))
+        for game_id, (_, board_values) in zip(game_ids, new_games)
+    ])
+    db.session.commit()
+    
+    return jsonify([
+        _created_game_summary(game_id, game_values, board_values)
+        for game_id, (game_values, board_values) in zip(game_ids, new_games)
+    ]), 201
+
+@api_bp.route('/games/export', methods=['GET'])
+def export_games():
+    after = request.args.get('after', 0, type=int)
+    limit = request.args.get('limit', type=int)
+    
+    chunks = game_transfer.iter_export(after, limit)
+    headers = {'Cache-Control': 'no-store', 'X-Accel-Buffering': 'no', 'Vary': 'Accept-Encoding'}
+    if 'gzip' in request.accept_encodings:
+        chunks = game_transfer.gzip_stream(chunks)
+        headers['Content-Encoding'] = 'gzip'
+    
+    return Response(stream_with_context(chunks), mimetype='application/x-ndjson', headers=headers)
+
+@api_bp.route('/games/import', methods=['POST'])
+def import_games():
+    chunk_size = max(1, min(request.args.get('chunk_size', game_transfer.IMPORT_CHUNK_SIZE, type=int), 10000))
+    stream = request.stream
+    if request.content_encoding == 'gzip':
+        stream = gzip.GzipFile(fileobj=stream, mode='rb')
+    text = io.TextIOWrapper(stream, encoding='utf-8')
+    
+    def generate():
+        for progress in game_transfer.import_games(text, chunk_size):
+            yield current_app.json.dumps(progress) + "\n"
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson', headers={
+        'Cache-Control': 'no-store',
+        'X-Accel-Buffering': 'no'
+    })
 
 @api_bp.route('/games/<int:game_id>', methods=['GET'])
 def get_game(game_id):
-    game = Game.query.get_or_404(game_id)
-    
-    return jsonify({
-        "id": game.id,
-        "player1_name": game.player1_name,
-        "player2_name": game.player2_name,
-        "status": game.status,
-        "board_state": {
-            "player1_water": game.board_state.player1_water,
-            "player2_water": game.board_state.player2_water,
-            "player1_camps": game.board_state.player1_camps,
-            "player2_camps": game.board_state.player2_camps,
-            "player1_columns": game.board_state.player1_columns,
-            "player2_columns": game.board_state.player2_columns,
-            "current_player": game.board_state.current_player,
-            "turn_number": game.board_state.turn_number
-        }
-    }), 200
+    return game_state.game_response(game_id)
+
+def _expected_version():
+    """Board version the client based its change on, from If-Match or the JSON body."""
+    for etag in request.if_match:
+        etag = json_provider.strip_etag_suffix(etag)
+        if etag.isdigit():
+            return int(etag)
+    data = request.get_json(silent=True)
+    version = data.get('version') if isinstance(data, dict) else None
+    return int(version) if version is not None else None
+
+def _touch_board(game_id):
+    """Bump the board version for writes that do not otherwise touch board_states."""
+    version = db.session.scalar(
+        update(BoardState).where(BoardState.game_id == game_id)
+        .values({BoardState.version: BoardState.version + 1})
+        .returning(BoardState.version)
+    )
+    if version is None:
+        abort(404)
+    return version
+
+def _commit_action(game_id, version, kind, payload, snapshot=False):
+    """Log a write as board version ``version``, commit it, then drop caches and notify watchers."""
+    action_log.record_action(game_id, version, kind, payload, snapshot)
+    db.session.commit()
+    game_state.invalidate(game_id)
+    stream.publish(game_id, version, kind, payload)
+
+def _version_conflict(game_id):
+    current = db.session.scalar(select(BoardState.version).where(BoardState.game_id == game_id))
+    if current is None:
+        abort(404)
+    return jsonify({"error": "Board has changed", "version": current}), 409
+
+@api_bp.route('/games/<int:game_id>/stream', methods=['GET'])
+def stream_game(game_id):
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    if last_event_id is None:
+        last_event_id = request.args.get('last_event_id', type=int)
+    
+    return Response(stream.event_stream(game_id, last_event_id), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
 
 @api_bp.route('/games/<int:game_id>/water', methods=['POST'])
 def update_water(game_id):
-    game = Game.query.get_or_404(game_id)
     data = request.json
     
     player = data.get('player')
-    amount = data.get('amount')
-    
-    if player == 1:
-        game.board_state.player1_water = max(0, game.board_state.player1_water + amount)
-    elif player == 2:
-        game.board_state.player2_water = max(0, game.board_state.player2_water + amount)
-    
-    db.session.commit()
+    amount = data.get('amount') or 0
+    
+    columns = (BoardState.player1_water, BoardState.player2_water, BoardState.version)
+    if player in (1, 2):
+        water = getattr(BoardState, f'player{player}_water')
+        stmt = update(BoardState).where(BoardState.game_id == game_id).values({
+            water: case((water + amount < 0, 0), else_=water + amount),
+            BoardState.version: BoardState.version + 1
+        }).returning(*columns)
+    else:
+        stmt = select(*columns).where(BoardState.game_id == game_id)
+    
+    row = db.session.execute(stmt).first()
+    if row is None:
+        abort(404)
+    if player in (1, 2):
+        _commit_action(game_id, row.version, 'water', {
+            "player1_water": row.player1_water,
+            "player2_water": row.player2_water
+        })
     
     return jsonify({
-        "player1_water": game.board_state.player1_water,
-        "player2_water": game.board_state.player2_water
+        "player1_water": row.player1_water,
+        "player2_water": row.player2_water,
+        "version": row.version
     }), 200
 
 @api_bp.route('/games/<int:game_id>/events', methods=['POST'])
 def add_event(game_id):
-    game = Game.query.get_or_404(game_id)
     data = request.json
+    version = _touch_board(game_id)
     
     event = GameEvent(
         game_id=game_id,
@@ -139,7 +267,8 @@ def add_event(game_id):
         effect=data.get('effect', '')
     )
     db.session.add(event)
-    db.session.commit()
+    db.session.flush()
+    _commit_action(game_id, version, 'event_added', game_state.serialize_event(event))
     
     return jsonify({
         "id": event.id,
@@ -151,77 +280,281 @@ def add_event(game_id):
 def remove_event(game_id, event_id):
     event = GameEvent.query.filter_by(game_id=game_id, id=event_id).first_or_404()
     db.session.delete(event)
-    db.session.commit()
+    version = _touch_board(game_id)
+    _commit_action(game_id, version, 'event_removed', {"id": event_id})
     
     return jsonify({"message": "Event removed"}), 200
 
 @api_bp.route('/games/<int:game_id>/board', methods=['PUT'])
 def update_board(game_id):
-    game = Game.query.get_or_404(game_id)
+    # Archived games keep their Game row but have no board, and answer 404 like unknown ones.
+    board_state = BoardState.query.filter_by(game_id=game_id).first_or_404()
     data = request.json
     
-    if 'player1_columns' in data:
-        game.board_state.player1_columns = data['player1_columns']
-    if 'player2_columns' in data:
-        game.board_state.player2_columns = data['player2_columns']
-    if 'player1_camps' in data:
-        game.board_state.player1_camps = data['player1_camps']
-    if 'player2_camps' in data:
-        game.board_state.player2_camps = data['player2_camps']
-    
-    db.session.commit()
-    
-    return jsonify({"message": "Board updated"}), 200
+    errors = validate_board_fields({field: data[field] for field in PATCHABLE_BOARD_FIELDS if field in data})
+    if errors:
+        return jsonify({"error": "Illegal board", "details": errors}), 422
+    
+    # A flush with nothing dirty keeps the version, so a no-op write is not logged.
+    updates = {
+        field: data[field] for field in PATCHABLE_BOARD_FIELDS
+        if field in data and data[field] != getattr(board_state, field)
+    }
+    if not updates:
+        return jsonify({"message": "Board unchanged", "version": board_state.version}), 200
+    
+    for field, value in updates.items():
+        setattr(board_state, field, value)
+    try:
+        db.session.flush()
+    except StaleDataError:
+        db.session.rollback()
+        return _version_conflict(game_id)
+    _commit_action(game_id, board_state.version, 'board', updates)
+    
+    return jsonify({"message": "Board updated", "version": board_state.version}), 200
+
+@api_bp.route('/games/<int:game_id>/board', methods=['PATCH'])
+def patch_board(game_id):
+    operations = request.json
+    if not isinstance(operations, list):
+        return jsonify({"error": "Expected a JSON Patch array"}), 400
+    
+    expected_version = _expected_version()
+    if expected_version is None:
+        return jsonify({"error": "If-Match with the board version is required"}), 428
+    
+    try:
+        fields = pointer_roots(operations)
+    except JsonPatchError as error:
+        return jsonify({"error": str(error)}), 400
+    unknown = fields - set(PATCHABLE_BOARD_FIELDS)
+    if unknown:
+        return jsonify({"error": f"Cannot patch board fields: {', '.join(sorted(unknown))}"}), 400
+    
+    board_state = BoardState.query.options(
+        load_only(BoardState.version, *[getattr(BoardState, field) for field in fields])
+    ).filter_by(game_id=game_id).first_or_404()
+    if board_state.version != expected_version:
+        return jsonify({"error": "Board has changed", "version": board_state.version}), 409
+    
+    document = {field: copy.deepcopy(getattr(board_state, field)) for field in fields}
+    try:
+        changed = apply_patch(document, operations)
+    except JsonPatchTestFailed as error:
+        return jsonify({"error": str(error), "version": board_state.version}), 409
+    except JsonPatchError as error:
+        return jsonify({"error": str(error)}), 400
+    
+    errors = validate_board_fields(document)
+    if errors:
+        return jsonify({"error": "Illegal board", "details": errors}), 422
+    
+    # Only `test` ops, or replaces with the current value: nothing to write or log.
+    modified = [field for field in fields if document[field] != getattr(board_state, field)]
+    if not modified:
+        response = jsonify({"version": board_state.version, "changed": []})
+        response.set_etag(str(board_state.version))
+        return response, 200
+    
+    for field in modified:
+        setattr(board_state, field, document[field])
+    try:
+        db.session.flush()
+    except StaleDataError:
+        db.session.rollback()
+        return _version_conflict(game_id)
+    _commit_action(game_id, board_state.version, 'patch', {"operations": operations})
+    
+    response = jsonify({"version": board_state.version, "changed": changed})
+    response.set_etag(str(board_state.version))
+    return response, 200
 
 @api_bp.route('/games/<int:game_id>/turn', methods=['POST'])
 def next_turn(game_id):
-    game = Game.query.get_or_404(game_id)
+    expected_version = _expected_version()
+    
+    stmt = update(BoardState).where(BoardState.game_id == game_id).values({
+        BoardState.current_player: 3 - BoardState.current_player,
+        BoardState.turn_number: BoardState.turn_number + case((BoardState.current_player == 2, 1), else_=0),
+        BoardState.player1_water: 3,
+        BoardState.player2_water: 3,
+        BoardState.version: BoardState.version + 1
+    })
+    if expected_version is not None:
+        stmt = stmt.where(BoardState.version == expected_version)
+    
+    row = db.session.execute(stmt.returning(
+        BoardState.current_player, BoardState.turn_number, BoardState.version
+    )).first()
+    if row is None:
+        db.session.rollback()
+        if expected_version is not None:
+            return _version_conflict(game_id)
+        abort(404)
+    resolved_events = advance_events(game_id, row.current_player)
+    _commit_action(game_id, row.version, 'turn', {
+        "current_player": row.current_player,
+        "turn_number": row.turn_number,
+        "player1_water": 3,
+        "player2_water": 3,
+        "resolved_events": resolved_events
+    })
+    
+    response = jsonify({
+        "current_player": row.current_player,
+        "turn_number": row.turn_number,
+        "version": row.version,
+        "resolved_events": resolved_events
+    })
+    response.set_etag(str(row.version))
+    return response, 200
+
+@api_bp.route('/games/<int:game_id>/finish', methods=['POST'])
+def finish_game(game_id):
+    data = request.json
+    winner = data.get('winner')
+    if winner not in (1, 2):
+        return jsonify({"error": "winner must be 1 or 2"}), 400
     
-    game.board_state.current_player = 2 if game.board_state.current_player == 1 else 1
-    if game.board_state.current_player == 1:
-        game.board_state.turn_number += 1
+    game = Game.query.get_or_404(game_id)
+    if game.status == 'finished':
+        return jsonify({"error": "Game is already finished", "winner": game.winner}), 409
     
-    game.board_state.player1_water = 3
-    game.board_state.player2_water = 3
+    game.status = 'finished'
+    game.winner = winner
+    game.finished_at = datetime.utcnow()
+    version = _touch_board(game_id)
+    _commit_action(game_id, version, 'finish', {"winner": winner})
     
-    db.session.commit()
+    return jsonify({"status": game.status, "winner": winner, "version": version}), 200
+
+@api_bp.route('/games/<int:game_id>/ai-move', methods=['POST'])
+def ai_move(game_id):
+    data = request.get_json(silent=True) or {}
+    budget_ms = data.get('budget_ms', ai.DEFAULT_BUDGET_MS)
+    # bool is an int subclass; true would otherwise mean a one millisecond budget.
+    if isinstance(budget_ms, bool) or not isinstance(budget_ms, (int, float)) or budget_ms <= 0:
+        return jsonify({"error": "budget_ms must be a positive number"}), 400
+    budget_ms = min(budget_ms, ai.MAX_BUDGET_MS)
+    
+    game = game_state.load_game(game_id)
+    if game is None or game.board_state is None:
+        abort(404)
+    snapshot = catalog.get_snapshot()
+    state = load_state(snapshot.card_table(), game.board_state, game.events)
+    version = game.board_state.version
+    # Release the connection before searching; the search never touches the database.
+    db.session.rollback()
+    if state.is_terminal:
+        return jsonify({"error": "Game is over", "version": version}), 409
+    
+    try:
+        move, search_stats = ai.choose_move(state, snapshot, budget_ms)
+    except ai.SearchBusy:
+        response = jsonify({"error": "All AI search slots are busy"})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    except ai.SearchFailed as error:
+        current_app.logger.warning("AI search failed for game %s: %s", game_id, error)
+        return jsonify({"error": f"The AI could not search this board: {error}", "version": version}), 422
     
     return jsonify({
-        "current_player": game.board_state.current_player,
-        "turn_number": game.board_state.turn_number
+        "player": state.current + 1,
+        "move": ai.describe_move(move),
+        "version": version,
+        **search_stats
     }), 200
 
+@api_bp.route('/games/<int:game_id>/history/<int:seq>', methods=['GET'])
+def get_game_history(game_id, seq):
+    state = action_log.state_at(game_id, seq)
+    if state is None:
+        abort(404)
+    
+    return jsonify({"seq": seq, "state": state}), 200
+
+@api_bp.route('/games/<int:game_id>/undo', methods=['POST'])
+def undo_action(game_id):
+    board_state = BoardState.query.filter_by(game_id=game_id).first_or_404()
+    
+    expected_version = _expected_version()
+    if expected_version is not None and expected_version != board_state.version:
+        return jsonify({"error": "Board has changed", "version": board_state.version}), 409
+    
+    data = request.get_json(silent=True)
+    target = data.get('seq') if isinstance(data, dict) else None
+    if target is None:
+        target = board_state.version - 1
+    if not 1 <= target < board_state.version:
+        return jsonify({"error": f"Cannot restore version {target}"}), 400
+    
+    state = action_log.state_at(game_id, target)
+    if state is None:
+        return jsonify({"error": f"No history for version {target}"}), 409
+    
+    action_log.restore_state(board_state, state)
+    try:
+        db.session.flush()
+    except StaleDataError:
+        db.session.rollback()
+        return _version_conflict(game_id)
+    # A restore can't be replayed from its payload, so it always starts a snapshot.
+    _commit_action(game_id, board_state.version, 'restore', {"seq": target}, snapshot=True)
+    
+    response = jsonify({"version": board_state.version, "restored_seq": target})
+    response.set_etag(str(board_state.version))
+    return response, 200
+
+@api_bp.route('/stats', methods=['GET'])
+def get_stats():
+    min_games = max(request.args.get('min_games', 1, type=int), 1)
+    limit = max(request.args.get('limit', 20, type=int), 1)
+    
+    return jsonify(stats.get_stats(min_games, limit)), 200
+
 @api_bp.route('/cards', methods=['GET'])
 def get_cards():
     search = request.args.get('search', '')
+    trait = request.args.get('trait', '')
     card_type = request.args.get('type', '')
-    
-    query = Card.query
-    
-    if search:
-        query = query.filter(or_(
-            Card.name.ilike(f'%{search}%'),
-            Card.abilities.cast(db.String).ilike(f'%{search}%')
-        ))
-    
-    if card_type:
-        query = query.filter_by(card_type=card_type)
-    
-    cards = query.all()
-    
-    return jsonify([{
-        "id": card.id,
-        "name": card.name,
-        "type": card.card_type,
-        "water_cost": card.water_cost,
-        "abilities": card.abilities,
-        "traits": card.traits,
-        "junk_effect": card.junk_effect,
-        "event_effect": card.event_effect,
-        "bomb_position": card.bomb_position,
-        "initial_draw": card.initial_draw,
-        "expansion": card.expansion
-    } for card in cards]), 200
+    after = request.args.get('after', type=int)
+    limit = request.args.get('limit', type=int)
+    
+    try:
+        fields = catalog.parse_fields(request.args.get('fields', ''))
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+    
+    if search or trait:
+        # Results come ranked, not in id order, so there is no cursor to page them by.
+        if after is not None:
+            return jsonify({"error": "after= cannot be combined with search= or trait="}), 400
+        cards = search_cards(search, card_type) if search else catalog.cards_with_trait(trait, card_type)
+        if search and trait:
+            cards = [card for card in cards if trait in (card["traits"] or [])]
+        if limit:
+            cards = cards[:limit]
+        return jsonify(catalog.project(cards, fields)), 200
+    
+    # Page only when asked to; a bare fields= projects the whole list.
+    if after is None and limit is None:
+        if 'fields' not in request.args:
+            return catalog.get_snapshot().response(card_type)
+        snapshot = catalog.get_snapshot()
+        cards = snapshot.by_type.get(card_type, []) if card_type else snapshot.cards
+        return jsonify(catalog.project(cards, fields)), 200
+    
+    limit = max(1, min(limit or catalog.DEFAULT_PAGE_SIZE, catalog.MAX_PAGE_SIZE))
+    cards, next_cursor = catalog.page_cards(fields, card_type, after, limit)
+    
+    response = jsonify(cards)
+    if next_cursor is not None:
+        args = request.args.to_dict()
+        args.update(after=next_cursor, limit=limit)
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+        response.headers['Link'] = f'<{url_for(".get_cards", **args)}>; rel="next"'
+    return response, 200
 
 @api_bp.route('/cards/seed', methods=['POST'])
 def seed_cards_endpoint():
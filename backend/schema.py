@@ -0,0 +1,107 @@
+import time
+
+import click
+from flask import current_app
+from sqlalchemy import JSON, inspect, or_, select, text, update
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.schema import CreateColumn
+
+from backend import db
+
+
+def upgrade_schema():
+    """Create missing tables, columns and indexes introduced since a table was created.
+
+    ``db.create_all`` never alters existing tables, so new nullable or
+    defaulted columns are added here with ``ALTER TABLE ... ADD COLUMN``,
+    and JSON columns from older Postgres databases are converted to JSONB.
+    """
+    db.create_all()
+
+    engine = db.engine
+    inspector = inspect(engine)
+    postgres = engine.dialect.name == 'postgresql'
+    with engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            existing = {column['name']: column['type'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                    connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {ddl}'))
+                elif postgres and isinstance(column.type, JSON) and not isinstance(existing[column.name], JSONB):
+                    # Columns created before the JSONB switch hold plain JSON text.
+                    connection.execute(text(
+                        f'ALTER TABLE {table.name} ALTER COLUMN {column.name} '
+                        f'TYPE JSONB USING {column.name}::jsonb'
+                    ))
+            for index in table.indexes:
+                index.create(bind=connection, checkfirst=True)
+
+
+def migrate_card_lists(batch_size=500):
+    """Move decks, hands and discards still held in the legacy JSON columns to the packed ones.
+
+    Boards are rewritten with table updates, so their version stays the
+    same; the game state does not change. A board whose ids do not fit the
+    packed format is left as it is and logged. Returns the number of boards
+    rewritten.
+    """
+    from backend.models import BoardState, CARD_LIST_FIELDS, pack_card_ids
+
+    table = BoardState.__table__
+    legacy = [table.c[field] for field in CARD_LIST_FIELDS]
+    packed = [table.c[f'{field}_packed'] for field in CARD_LIST_FIELDS]
+    migrated = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(table.c.id, *legacy, *packed)
+            .where(table.c.id > last_id, or_(*[column.is_not(None) for column in legacy]))
+            .order_by(table.c.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        for row in rows:
+            last_id = row.id
+            values = {}
+            try:
+                for field in CARD_LIST_FIELDS:
+                    if row._mapping[table.c[f'{field}_packed']] is None:
+                        values[f'{field}_packed'] = pack_card_ids(row._mapping[table.c[field]] or [])
+                    values[field] = None
+            except ValueError as error:
+                current_app.logger.warning("Board %s keeps its JSON card lists: %s", row.id, error)
+                continue
+            db.session.execute(update(table).where(table.c.id == row.id).values(values))
+            migrated += 1
+        db.session.commit()
+    return migrated
+
+
+def setup_database():
+    """Bring the schema up to date, seed an empty card table and write the catalog snapshot file."""
+    from backend import catalog
+    from backend.models import Card
+    from backend.search import ensure_search_index
+    from backend.seeds import seed_cards
+
+    upgrade_schema()
+    migrate_card_lists()
+    ensure_search_index()
+
+    seeded = False
+    if db.session.query(Card.id).first() is None:
+        seed_cards()
+        seeded = True
+    catalog.write_snapshot_file()
+    return seeded
+
+
+@click.command('setup-db')
+def setup_db_command():
+    """Create or upgrade tables, seed the cards and write the catalog snapshot."""
+    started = time.perf_counter()
+    seeded = setup_database()
+    elapsed = (time.perf_counter() - started) * 1000
+    click.echo(f"Database ready{' and seeded' if seeded else ''} in {elapsed:.0f} ms")
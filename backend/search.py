@@ -0,0 +1,152 @@
+import re
+
+from flask import current_app
+from sqlalchemy import inspect, or_, text
+from sqlalchemy.exc import DBAPIError
+
+from backend import db
+from backend.models import Card
+from backend import catalog
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# The shadow tables hold one document per card split into weighted fields,
+# so name hits rank above ability text, which ranks above traits/effects.
+SQLITE_SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS cards_fts USING fts5("
+    "name, abilities, traits, effects, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+]
+
+POSTGRES_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS card_search ("
+    "card_id INTEGER PRIMARY KEY REFERENCES cards(id) ON DELETE CASCADE, "
+    "document TSVECTOR NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_card_search_document ON card_search USING GIN (document)"
+]
+
+
+def _flatten(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        return ' '.join(_flatten(v) for v in value.values())
+    if isinstance(value, list):
+        return ' '.join(_flatten(v) for v in value)
+    return ''
+
+
+def card_document(card):
+    return {
+        "id": card.id,
+        "name": card.name or '',
+        "abilities": _flatten(card.abilities),
+        "traits": _flatten(card.traits),
+        "effects": _flatten([card.junk_effect, card.event_effect])
+    }
+
+
+SEARCH_TABLES = {'sqlite': 'cards_fts', 'postgresql': 'card_search'}
+
+
+def _backend():
+    """Search backend of this app, detected once per worker when setup ran in another process."""
+    extensions = current_app.extensions
+    if 'card_search' not in extensions:
+        dialect = db.engine.dialect.name
+        table = SEARCH_TABLES.get(dialect)
+        extensions['card_search'] = dialect if table and inspect(db.engine).has_table(table) else None
+    return extensions['card_search']
+
+
+def ensure_search_index():
+    """Create the search shadow table for the current dialect and fill it if stale."""
+    dialect = db.engine.dialect.name
+    statements = {'sqlite': SQLITE_SCHEMA, 'postgresql': POSTGRES_SCHEMA}.get(dialect)
+    backend = None
+    if statements:
+        try:
+            for statement in statements:
+                db.session.execute(text(statement))
+            db.session.commit()
+            backend = dialect
+        except DBAPIError:
+            db.session.rollback()
+            current_app.logger.warning("Full-text search unavailable, falling back to LIKE search")
+    current_app.extensions['card_search'] = backend
+
+    if backend:
+        table = SEARCH_TABLES[backend]
+        indexed = db.session.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+        if indexed != Card.query.count():
+            rebuild_search_index()
+
+
+def rebuild_search_index():
+    backend = _backend()
+    if not backend:
+        return
+
+    documents = [card_document(card) for card in Card.query.all()]
+    if backend == 'sqlite':
+        db.session.execute(text("DELETE FROM cards_fts"))
+        insert = text(
+            "INSERT INTO cards_fts (rowid, name, abilities, traits, effects) "
+            "VALUES (:id, :name, :abilities, :traits, :effects)"
+        )
+    else:
+        db.session.execute(text("DELETE FROM card_search"))
+        insert = text(
+            "INSERT INTO card_search (card_id, document) VALUES (:id, "
+            "setweight(to_tsvector('simple', :name), 'A') || "
+            "setweight(to_tsvector('simple', :abilities), 'B') || "
+            "setweight(to_tsvector('simple', :traits), 'C') || "
+            "setweight(to_tsvector('simple', :effects), 'D'))"
+        )
+    if documents:
+        db.session.execute(insert, documents)
+    db.session.commit()
+
+
+def _ranked_ids(tokens):
+    if _backend() == 'sqlite':
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        rows = db.session.execute(text(
+            "SELECT rowid FROM cards_fts WHERE cards_fts MATCH :match "
+            "ORDER BY bm25(cards_fts, 10.0, 4.0, 2.0, 1.0), rowid"
+        ), {"match": match})
+    else:
+        tsquery = ' & '.join(f'{token}:*' for token in tokens)
+        rows = db.session.execute(text(
+            "SELECT card_id FROM card_search, to_tsquery('simple', :query) query "
+            "WHERE document @@ query ORDER BY ts_rank(document, query) DESC, card_id"
+        ), {"query": tsquery})
+    return [row[0] for row in rows]
+
+
+def _like_ids(search):
+    pattern = f'%{search}%'
+    cards = Card.query.with_entities(Card.id, Card.name).filter(or_(
+        Card.name.ilike(pattern),
+        Card.abilities.cast(db.String).ilike(pattern),
+        Card.traits.cast(db.String).ilike(pattern),
+        Card.junk_effect.ilike(pattern),
+        Card.event_effect.ilike(pattern)
+    )).order_by(Card.id).all()
+    lowered = search.lower()
+    return [card.id for card in sorted(cards, key=lambda card: lowered not in card.name.lower())]
+
+
+def search_cards(search, card_type=''):
+    """Return serialized cards matching ``search``, best match first."""
+    tokens = [token.lower() for token in _TOKEN_RE.findall(search)]
+    if not tokens:
+        return []
+
+    ids = _ranked_ids(tokens) if _backend() else _like_ids(search)
+
+    by_id = catalog.get_snapshot().by_id
+    cards = [by_id[card_id] for card_id in ids if card_id in by_id]
+    if card_type:
+        cards = [card for card in cards if card["type"] == card_type]
+    return cards
@@ -1,8 +1,26 @@
 from backend import db
 from backend.models import Card
+from backend import catalog
+from backend.search import rebuild_search_index
+from sqlalchemy import bindparam, update
+from sqlalchemy.dialects import postgresql, sqlite
 
-def seed_cards():
-    """Seed the database with Radlands cards from the rulebook"""
+CARD_DEFAULTS = {
+    "card_type": None,
+    "water_cost": 0,
+    "abilities": [],
+    "traits": [],
+    "junk_effect": None,
+    "event_effect": None,
+    "bomb_position": None,
+    "initial_draw": None,
+    "expansion": "base"
+}
+
+UPSERT_BATCH_SIZE = 500
+
+def base_cards():
+    """Radlands cards from the rulebook"""
     
     cards_data = []
     
@@ -495,24 +513,78 @@ def seed_cards():
         },
     ])
     
-    added_count = 0
-    updated_count = 0
+    return cards_data
+
+def normalize_card(card_data):
+    row = {"name": card_data["name"]}
+    for key, default in CARD_DEFAULTS.items():
+        value = card_data.get(key, default)
+        row[key] = list(default) if value is None and isinstance(default, list) else value
+    if row["card_type"] is None:
+        row["card_type"] = card_data.get("type")
+    return row
+
+def _dialect_insert():
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert
+    if dialect == 'sqlite':
+        return sqlite.insert
+    return None
+
+def upsert_cards(cards_data):
+    """Insert or update cards by name with one SELECT and one statement per batch.
     
+    The caller is responsible for committing.
+    """
+    rows = {}
     for card_data in cards_data:
-        existing = Card.query.filter_by(name=card_data['name']).first()
-        if existing:
-            for key, value in card_data.items():
-                setattr(existing, key, value)
-            updated_count += 1
-        else:
-            card = Card(**card_data)
-            db.session.add(card)
-            added_count += 1
+        row = normalize_card(card_data)
+        rows[row["name"]] = row
+    rows = list(rows.values())
+    if not rows:
+        return {"added": 0, "updated": 0, "total": 0}
     
-    db.session.commit()
+    existing = {
+        name for (name,) in db.session.query(Card.name).filter(Card.name.in_([row["name"] for row in rows]))
+    }
     
+    insert = _dialect_insert()
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        batch = rows[start:start + UPSERT_BATCH_SIZE]
+        if insert is not None:
+            stmt = insert(Card.__table__).values(batch)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Card.name],
+                set_={key: stmt.excluded[key] for key in CARD_DEFAULTS}
+            )
+            db.session.execute(stmt)
+            continue
+        
+        new_rows = [row for row in batch if row["name"] not in existing]
+        old_rows = [dict(row, match_name=row["name"]) for row in batch if row["name"] in existing]
+        if new_rows:
+            db.session.execute(Card.__table__.insert(), new_rows)
+        if old_rows:
+            db.session.execute(
+                update(Card.__table__).where(Card.name == bindparam("match_name")),
+                old_rows
+            )
+    
+    updated_count = len(existing)
     return {
-        "added": added_count,
+        "added": len(rows) - updated_count,
         "updated": updated_count,
-        "total": len(cards_data)
+        "total": len(rows)
     }
+
+def seed_cards():
+    """Seed the database with Radlands cards from the rulebook"""
+    
+    result = upsert_cards(base_cards())
+    
+    db.session.commit()
+    catalog.refresh()
+    rebuild_search_index()
+    
+    return result
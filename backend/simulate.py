@@ -0,0 +1,163 @@
+"""Headless self-play over the card catalog.
+
+Runs reproducible games with the rules engine across a process pool and
+streams one NDJSON result per game. Decks are dealt exactly as
+``create_game`` deals them. Game ``i`` of a run seeded with ``s`` always
+plays out the same way, whatever the worker count.
+
+    python -m backend.simulate --games 10000 --policy heuristic --out results.ndjson
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from backend import catalog, engine
+
+POLICIES = ('random', 'heuristic')
+DEFAULT_CHUNK_SIZE = 50
+
+_cards = None
+_table = None
+
+
+def load_cards(path=None):
+    """Catalog card dicts from an exported /api/cards file, or the seeded base set."""
+    if path:
+        with open(path, encoding='utf-8') as stream:
+            return json.load(stream)
+
+    from backend.seeds import base_cards
+    cards = []
+    for card_id, card in enumerate(base_cards(), start=1):
+        card = dict(card, id=card_id, type=card["card_type"])
+        cards.append(card)
+    return cards
+
+
+def choose_move(state, policy, rng):
+    moves = state.legal_moves()
+    if policy == 'random':
+        return rng.choice(moves)
+
+    player = state.current
+    best_score = None
+    best_moves = []
+    for move in moves:
+        score = engine.material(state.apply(move), player) if move[0] != 'end' else engine.material(state, player) - 0.25
+        if best_score is None or score > best_score:
+            best_score, best_moves = score, [move]
+        elif score == best_score:
+            best_moves.append(move)
+    return rng.choice(best_moves)
+
+
+def play_game(cards, table, game_index, seed, policies, expansions=None):
+    rng = random.Random(f"{seed}:{game_index}")
+    camps = [card for card in cards if card["type"] == 'camp']
+    by_name = {card["name"]: card for card in cards}
+    deck_pool = catalog.build_deck_pool(cards, expansions)
+    starting_hand = catalog.starting_hand_ids(by_name)
+
+    picks = [rng.sample(camps, 3), rng.sample(camps, 3)]
+    players = []
+    for player_camps in picks:
+        deck, hand = catalog.deal(deck_pool, starting_hand, player_camps, rng)
+        players.append(engine.load_player(engine.STARTING_WATER, player_camps, None, hand, deck, [], []))
+    start_player = rng.choice([1, 2])
+    state = engine.GameState(table, tuple(players), start_player - 1)
+
+    moves = 0
+    while not state.is_terminal:
+        state = state.apply(choose_move(state, policies[state.current], rng))
+        moves += 1
+
+    return {
+        "game": game_index,
+        "seed": seed,
+        "winner": state.winner + 1 if state.winner is not None else None,
+        "start_player": start_player,
+        "turns": state.turn,
+        "moves": moves,
+        "policies": list(policies),
+        "camps": [[camp["name"] for camp in player_camps] for player_camps in picks]
+    }
+
+
+def _init_worker(cards):
+    global _cards, _table
+    _cards = cards
+    _table = engine.CardTable(cards)
+
+
+def _play_chunk(args):
+    start, stop, seed, policies, expansions = args
+    return [play_game(_cards, _table, index, seed, policies, expansions) for index in range(start, stop)]
+
+
+def run_simulation(games, seed=0, policies=('random', 'random'), workers=None, cards=None,
+                   expansions=None, out=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Play ``games`` games and write NDJSON results to ``out`` as chunks finish.
+
+    Returns a summary with win counts and games per second.
+    """
+    cards = cards if cards is not None else load_cards()
+    workers = workers or os.cpu_count() or 1
+    chunks = [
+        (start, min(start + chunk_size, games), seed, tuple(policies), expansions)
+        for start in range(0, games, chunk_size)
+    ]
+
+    wins = {1: 0, 2: 0, None: 0}
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cards,)) as executor:
+        for results in executor.map(_play_chunk, chunks):
+            for result in results:
+                wins[result["winner"]] += 1
+                if out is not None:
+                    out.write(json.dumps(result, separators=(',', ':')) + "\n")
+    elapsed = time.perf_counter() - started
+
+    return {
+        "games": games,
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "games_per_second": round(games / elapsed, 1) if elapsed else None,
+        "player1_wins": wins[1],
+        "player2_wins": wins[2],
+        "unfinished": wins[None]
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run headless Radlands self-play games.")
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--policy', choices=POLICIES, default='random', help="Policy for both players.")
+    parser.add_argument('--player1-policy', choices=POLICIES)
+    parser.add_argument('--player2-policy', choices=POLICIES)
+    parser.add_argument('--workers', type=int, help="Worker processes; defaults to the CPU count.")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--cards', help="JSON card list as returned by GET /api/cards.")
+    parser.add_argument('--expansion', action='append', dest='expansions')
+    parser.add_argument('--out', default='-', help="NDJSON output file, '-' for stdout.")
+    args = parser.parse_args(argv)
+
+    policies = (args.player1_policy or args.policy, args.player2_policy or args.policy)
+    out = sys.stdout if args.out == '-' else open(args.out, 'w', encoding='utf-8')
+    try:
+        summary = run_simulation(
+            args.games, args.seed, policies, args.workers, load_cards(args.cards),
+            args.expansions, out, args.chunk_size
+        )
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(json.dumps(summary), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
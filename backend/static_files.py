@@ -0,0 +1,151 @@
+"""In-memory serving of the built frontend in dist/.
+
+The manifest reads every file in dist/ once when the app is created, with
+its gzip and brotli variants and an ETag, so serving a static request never
+touches the filesystem. Hashed Vite assets are cached by browsers as
+immutable; everything else is revalidated by ETag. Unknown paths outside
+``assets/`` and ``api/`` get index.html so client-side routes work.
+
+``flask compress-static`` (run from build.sh) writes the .gz and .br files
+next to the originals; gzip variants missing on disk are made in memory.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+
+import click
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+MIN_COMPRESS_SIZE = 1024
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml', 'application/xml')
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# Vite appends a content hash to file names it emits, e.g. index-DGkmLA4V.js
+_HASHED_RE = re.compile(r'-[A-Za-z0-9_-]{8,}\.\w+$')
+
+
+def _compressible(mimetype, size):
+    return size >= MIN_COMPRESS_SIZE and mimetype.startswith(COMPRESSIBLE_TYPES)
+
+
+class StaticAsset:
+    __slots__ = ('body', 'mimetype', 'etag', 'cache_control', 'variants')
+
+    def __init__(self, body, mimetype, cache_control, variants):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.sha1(body).hexdigest()[:20]
+        self.cache_control = cache_control
+        # encoding -> compressed body
+        self.variants = variants
+
+    def select(self, accept_encodings):
+        """Return ``(body, encoding, etag)`` for the best encoding the client accepts."""
+        for encoding, _ in ENCODINGS:
+            body = self.variants.get(encoding)
+            if body is not None and accept_encodings[encoding]:
+                return body, encoding, f"{self.etag}-{encoding}"
+        return self.body, None, self.etag
+
+
+def _read(path):
+    with open(path, 'rb') as stream:
+        return stream.read()
+
+
+def load_asset(root, name):
+    path = os.path.join(root, name)
+    body = _read(path)
+    mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    immutable = name.startswith('assets/') and _HASHED_RE.search(name)
+
+    variants = {}
+    if _compressible(mimetype, len(body)):
+        for encoding, suffix in ENCODINGS:
+            compressed = path + suffix
+            if os.path.exists(compressed) and os.path.getmtime(compressed) >= os.path.getmtime(path):
+                variants[encoding] = _read(compressed)
+        if 'gzip' not in variants:
+            variants['gzip'] = gzip.compress(body, 6, mtime=0)
+        variants = {encoding: data for encoding, data in variants.items() if len(data) < len(body)}
+
+    return StaticAsset(body, mimetype, IMMUTABLE if immutable else REVALIDATE, variants)
+
+
+def _source_files(root):
+    for directory, _, files in os.walk(root):
+        for filename in files:
+            if filename.endswith(('.gz', '.br')):
+                continue
+            yield os.path.relpath(os.path.join(directory, filename), root).replace(os.sep, '/')
+
+
+class StaticManifest:
+    def __init__(self, root):
+        self.root = root
+        self.assets = {}
+        if os.path.isdir(root):
+            for name in _source_files(root):
+                self.assets[name] = load_asset(root, name)
+        self.index = self.assets.get('index.html')
+
+    def lookup(self, path):
+        """Asset for a request path: the file itself, else index.html for app routes."""
+        asset = self.assets.get(path)
+        if asset is None and not path.startswith(('assets/', 'api/')):
+            asset = self.index
+        return asset
+
+    def response(self, app, request, path):
+        asset = self.lookup(path or 'index.html')
+        if asset is None:
+            return app.response_class("Not Found", status=404, mimetype='text/plain')
+
+        body, encoding, etag = asset.select(request.accept_encodings)
+        response = app.response_class(body, mimetype=asset.mimetype)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = asset.cache_control
+        if asset.variants:
+            response.vary.add('Accept-Encoding')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        return response.make_conditional(request)
+
+
+def compress_directory(root):
+    """Write .gz (and .br when brotli is installed) files beside every compressible file in ``root``."""
+    written = 0
+    for name in _source_files(root):
+        path = os.path.join(root, name)
+        body = _read(path)
+        mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if not _compressible(mimetype, len(body)):
+            continue
+        outputs = {'.gz': gzip.compress(body, 9, mtime=0)}
+        if brotli is not None:
+            outputs['.br'] = brotli.compress(body, quality=11)
+        for suffix, data in outputs.items():
+            with open(path + suffix, 'wb') as stream:
+                stream.write(data)
+            written += 1
+    return written
+
+
+@click.command('compress-static')
+@click.argument('root', required=False)
+def compress_static_command(root):
+    """Precompress the built frontend (dist/ by default)."""
+    from flask import current_app
+
+    root = root or current_app.config['FRONTEND_DIST']
+    written = compress_directory(root)
+    click.echo(f"Wrote {written} compressed files in {root}"
+               + ("" if brotli is not None else " (brotli not installed, gzip only)"))
@@ -0,0 +1,234 @@
+"""Aggregate statistics over finished games.
+
+Newly finished games are loaded in bulk, with one joined query for games and
+boards and one for their logged water and turn actions; archived games are
+read from their archive rows instead. They are laid out as
+per-game columns, and every statistic is a single pass over those columns.
+Totals are kept per worker and only absorb games finished since the last
+refresh, so a warm request costs one indexed query on ``games.finished_at``
+and a read of the stats version row. Imports add finished games behind the
+watermark; they bump that row, and every worker then rebuilds its totals.
+"""
+import threading
+from array import array
+from collections import namedtuple
+from datetime import timedelta
+
+from sqlalchemy import select, update
+
+from backend import archive, catalog, db
+from backend.models import BoardState, Game, GameAction, StatsVersion
+
+# Games committed slightly out of finished_at order are caught by re-reading
+# this window behind the watermark; ids already counted are skipped.
+FINISH_OVERLAP = timedelta(seconds=30)
+ACTION_BATCH_SIZE = 500
+STARTING_WATER = 3
+
+FinishedGame = namedtuple('FinishedGame', (
+    'id', 'winner', 'finished_at', 'start_player', 'turn_number', 'player1_camps', 'player2_camps'
+))
+
+
+def _camp_name(entry, by_id):
+    if isinstance(entry, dict):
+        card = entry.get("card") if isinstance(entry.get("card"), dict) else entry
+        if card.get("name"):
+            return card["name"]
+        entry = card.get("card_id", card.get("id"))
+    card = by_id.get(entry) if isinstance(entry, int) else None
+    return card["name"] if card else str(entry)
+
+
+def _from_archive(row, data):
+    """Fill the board columns of a finished game's row from its archive, if it was archived."""
+    if data is None:
+        return row
+    state = data["state"]
+    return row._replace(
+        start_player=state.get("start_player"),
+        turn_number=state.get("turn_number"),
+        player1_camps=state.get("player1_camps"),
+        player2_camps=state.get("player2_camps")
+    )
+
+
+def water_spent(game_index, kinds, player1_water, player2_water, games):
+    """Water spent and turns played per game from action columns sorted by game and seq.
+
+    Spending is every drop in a player's water between consecutive water
+    actions; a turn refills both players. After a restore the previous
+    levels are unknown, so drops are not counted until the next turn.
+    """
+    spent = array('l', [0]) * games
+    turns = array('l', [1]) * games
+    previous = None
+    current_game = -1
+    for index, kind, water1, water2 in zip(game_index, kinds, player1_water, player2_water):
+        if index != current_game:
+            current_game = index
+            previous = (STARTING_WATER, STARTING_WATER)
+        if kind == 'turn':
+            turns[index] += 1
+            previous = (STARTING_WATER, STARTING_WATER)
+        elif kind == 'restore':
+            previous = None
+        elif previous is not None:
+            spent[index] += max(previous[0] - water1, 0) + max(previous[1] - water2, 0)
+            previous = (water1, water2)
+        else:
+            previous = (water1, water2)
+    return spent, turns
+
+
+def current_stats_version():
+    return db.session.scalar(select(StatsVersion.version).where(StatsVersion.id == 1)) or 0
+
+
+def bump_stats_version():
+    """Make every worker rebuild its totals; call in the transaction that adds back-dated finished games."""
+    updated = db.session.execute(
+        update(StatsVersion).where(StatsVersion.id == 1).values(version=StatsVersion.version + 1)
+    ).rowcount
+    if not updated:
+        db.session.add(StatsVersion(id=1, version=1))
+
+
+class GameStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset(None)
+
+    def _reset(self, version):
+        self._version = version
+        self._watermark = None
+        self._recent = {}
+        self.games = 0
+        self.first_player_wins = 0
+        self.rounds = 0
+        self.player_turns = 0
+        self.water_spent = 0
+        self.camps = {}
+        self.combinations = {}
+
+    def _load_finished(self):
+        stmt = (
+            select(
+                Game.id, Game.winner, Game.finished_at, BoardState.start_player,
+                BoardState.turn_number, BoardState.player1_camps, BoardState.player2_camps
+            )
+            .outerjoin(BoardState, BoardState.game_id == Game.id)
+            .where(Game.status == 'finished', Game.winner.in_((1, 2)))
+            .order_by(Game.finished_at, Game.id)
+        )
+        if self._watermark is not None:
+            stmt = stmt.where(Game.finished_at >= self._watermark - FINISH_OVERLAP)
+        return [FinishedGame(*row) for row in db.session.execute(stmt) if row.id not in self._recent]
+
+    def _load_actions(self, game_ids, archived):
+        """Action columns for ``game_ids`` grouped by game in seq order, as positions into ``game_ids``."""
+        positions = {game_id: index for index, game_id in enumerate(game_ids)}
+        game_index, kinds = array('l'), []
+        player1_water, player2_water = array('l'), array('l')
+        for game_id, data in archived.items():
+            for _, kind, payload in data["actions"]:
+                if kind in ('water', 'turn', 'restore'):
+                    game_index.append(positions[game_id])
+                    kinds.append(kind)
+                    player1_water.append((payload or {}).get("player1_water", 0))
+                    player2_water.append((payload or {}).get("player2_water", 0))
+        for start in range(0, len(game_ids), ACTION_BATCH_SIZE):
+            rows = db.session.execute(
+                select(GameAction.game_id, GameAction.kind, GameAction.payload)
+                .where(
+                    GameAction.game_id.in_(game_ids[start:start + ACTION_BATCH_SIZE]),
+                    GameAction.kind.in_(('water', 'turn', 'restore'))
+                )
+                .order_by(GameAction.game_id, GameAction.seq)
+            )
+            for game_id, kind, payload in rows:
+                game_index.append(positions[game_id])
+                kinds.append(kind)
+                player1_water.append((payload or {}).get("player1_water", 0))
+                player2_water.append((payload or {}).get("player2_water", 0))
+        return game_index, kinds, player1_water, player2_water
+
+    def refresh(self):
+        """Fold games finished since the last refresh into the running totals."""
+        with self._lock:
+            version = current_stats_version()
+            if version != self._version:
+                self._reset(version)
+            rows = self._load_finished()
+            if not rows:
+                return
+            by_id = catalog.get_snapshot().by_id
+            game_ids = [row.id for row in rows]
+            archived = archive.load_many([row.id for row in rows if row.start_player is None])
+            rows = [_from_archive(row, archived.get(row.id)) for row in rows]
+            winners = array('b', [row.winner for row in rows])
+            start_players = array('b', [row.start_player or 1 for row in rows])
+            rounds = array('l', [row.turn_number or 1 for row in rows])
+            picks = [
+                (tuple(sorted(_camp_name(camp, by_id) for camp in row.player1_camps or [])),
+                 tuple(sorted(_camp_name(camp, by_id) for camp in row.player2_camps or [])))
+                for row in rows
+            ]
+            spent, player_turns = water_spent(*self._load_actions(game_ids, archived), len(rows))
+
+            self.games += len(rows)
+            self.first_player_wins += sum(winner == start for winner, start in zip(winners, start_players))
+            self.rounds += sum(rounds)
+            self.player_turns += sum(player_turns)
+            self.water_spent += sum(spent)
+            for winner, sides in zip(winners, picks):
+                for player, combination in enumerate(sides, start=1):
+                    won = int(winner == player)
+                    totals = self.combinations.setdefault(combination, [0, 0])
+                    totals[0] += 1
+                    totals[1] += won
+                    for name in combination:
+                        totals = self.camps.setdefault(name, [0, 0])
+                        totals[0] += 1
+                        totals[1] += won
+
+            self._watermark = max(self._watermark or rows[-1].finished_at, rows[-1].finished_at)
+            self._recent.update((row.id, row.finished_at) for row in rows)
+            horizon = self._watermark - FINISH_OVERLAP
+            self._recent = {game_id: at for game_id, at in self._recent.items() if at >= horizon}
+
+    def summary(self, min_games=1, limit=20):
+        with self._lock:
+            return self._summary(min_games, limit)
+
+    def _summary(self, min_games, limit):
+        def rates(totals):
+            return [
+                {"games": games, "wins": wins, "win_rate": round(wins / games, 4), **key}
+                for key, (games, wins) in totals
+                if games >= min_games
+            ]
+
+        camps = rates(({"camp": name}, value) for name, value in self.camps.items())
+        combinations = rates(({"camps": list(names)}, value) for names, value in self.combinations.items())
+        for rows in (camps, combinations):
+            rows.sort(key=lambda row: (-row["win_rate"], -row["games"]))
+
+        return {
+            "games": self.games,
+            "first_player_win_rate": round(self.first_player_wins / self.games, 4) if self.games else None,
+            "average_rounds": round(self.rounds / self.games, 2) if self.games else None,
+            "average_water_spent_per_turn": (
+                round(self.water_spent / self.player_turns, 3) if self.player_turns else None
+            ),
+            "camps": camps,
+            "camp_combinations": combinations[:limit]
+        }
+
+
+_stats = GameStats()
+
+
+def get_stats(min_games=1, limit=20):
+    _stats.refresh()
+    return _stats.summary(min_games, limit)
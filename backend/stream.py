@@ -0,0 +1,155 @@
+"""Server-Sent Events fan-out of game changes.
+
+Each worker keeps one channel per watched game. Writes handled by this
+worker publish compact change events straight into the channel; a single
+poller thread per channel picks up writes made by other workers by watching
+the board version. Streams hold a connection open, so run gunicorn with a
+threaded or async worker class.
+"""
+import threading
+import time
+from collections import deque
+
+from flask import current_app
+from werkzeug.exceptions import HTTPException
+
+from backend import game_state
+
+HEARTBEAT_INTERVAL = 15
+POLL_INTERVAL = 1.0
+BACKLOG_SIZE = 256
+# Event kinds that carry the whole state (or ask for it), so they need no base version.
+COMPLETE_KINDS = ('state', 'resync')
+
+
+def format_event(event_id, kind, data):
+    return f"id: {event_id}\nevent: {kind}\ndata: {data}\n\n"
+
+
+class Channel:
+    def __init__(self, game_id, version):
+        self.game_id = game_id
+        self.version = version
+        self.subscribers = 0
+        self._backlog = deque(maxlen=BACKLOG_SIZE)
+        self._condition = threading.Condition()
+
+    def publish(self, version, kind, data):
+        with self._condition:
+            if version <= self.version:
+                return
+            # A change event patches the previous version. If versions were
+            # written in between (by another worker, say), watchers lack its
+            # base and must refetch instead.
+            complete = kind in COMPLETE_KINDS
+            if not complete and version != self.version + 1:
+                kind, data, complete = 'resync', f'{{"version":{version}}}', True
+            self.version = version
+            self._backlog.append((version, format_event(version, kind, data), complete))
+            self._condition.notify_all()
+
+    def since(self, last_id):
+        """Encoded events after ``last_id``, or None if they no longer follow on from it.
+
+        Versions may only be skipped by a full state or resync event, which
+        does not depend on what the client had before.
+        """
+        with self._condition:
+            if last_id >= self.version:
+                return []
+            events = []
+            expected = last_id + 1
+            for version, event, complete in self._backlog:
+                if version <= last_id:
+                    continue
+                if version != expected and not complete:
+                    return None
+                events.append((version, event))
+                expected = version + 1
+            return events if events else None
+
+    def wait(self, last_id, timeout):
+        with self._condition:
+            if last_id >= self.version:
+                self._condition.wait(timeout)
+        return self.since(last_id)
+
+
+class Hub:
+    def __init__(self):
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, app, game_id, version):
+        with self._lock:
+            channel = self._channels.get(game_id)
+            if channel is None:
+                channel = self._channels[game_id] = Channel(game_id, version)
+                threading.Thread(target=self._poll, args=(app, channel), daemon=True).start()
+            channel.subscribers += 1
+            return channel
+
+    def unsubscribe(self, channel):
+        with self._lock:
+            channel.subscribers -= 1
+
+    def publish(self, game_id, version, kind, payload):
+        channel = self._channels.get(game_id)
+        if channel is not None:
+            channel.publish(version, kind, current_app.json.dumps(payload))
+
+    def _poll(self, app, channel):
+        while True:
+            time.sleep(POLL_INTERVAL)
+            with self._lock:
+                if channel.subscribers <= 0:
+                    del self._channels[channel.game_id]
+                    return
+            with app.app_context():
+                try:
+                    version = game_state.current_version(channel.game_id)
+                    if version is not None and version > channel.version:
+                        version, body = game_state.game_body(channel.game_id, version)
+                        channel.publish(version, 'state', body.decode('utf-8').rstrip('\n'))
+                except HTTPException:
+                    pass
+                except Exception:
+                    app.logger.exception("Game stream poll failed for game %s", channel.game_id)
+
+
+hub = Hub()
+
+
+def publish(game_id, version, kind, payload):
+    hub.publish(game_id, version, kind, payload)
+
+
+def event_stream(game_id, last_event_id=None):
+    """Generator of SSE frames for a game; call inside the request, iterate after it."""
+    version, body = game_state.game_body(game_id)
+    app = current_app._get_current_object()
+
+    def generate():
+        channel = hub.subscribe(app, game_id, version)
+        try:
+            yield "retry: 3000\n\n"
+            if last_event_id is None or channel.since(last_event_id) is None:
+                yield format_event(version, 'state', body.decode('utf-8').rstrip('\n'))
+                cursor = version
+            else:
+                cursor = last_event_id
+
+            while True:
+                events = channel.wait(cursor, HEARTBEAT_INTERVAL)
+                if events is None:
+                    cursor = channel.version
+                    yield format_event(cursor, 'resync', f'{{"version":{cursor}}}')
+                elif events:
+                    for cursor, event in events:
+                        yield event
+                else:
+                    yield ": heartbeat\n\n"
+        finally:
+            hub.unsubscribe(channel)
+
+    return generate()
@@ -0,0 +1,46 @@
+"""Performance benchmarks for the Flask API.
+
+Each module is a command line tool that boots ``create_app`` against a
+throwaway SQLite database unless a ``--database-url`` is given:
+
+    python -m benchmarks.encode    # encoder cost per response payload
+    python -m benchmarks.load      # latency, throughput and SQL per endpoint
+"""
+import os
+import tempfile
+
+
+def boot_app(database_url=None):
+    """Create the app on ``database_url``, or on a new SQLite file seeded with the catalog.
+
+    Returns ``(app, workdir)``; the work directory also holds the catalog
+    snapshot so benchmarks never touch the real instance folder.
+    """
+    workdir = tempfile.mkdtemp(prefix='radlands-bench-')
+    os.environ['DATABASE_URL'] = database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ['CATALOG_SNAPSHOT'] = os.path.join(workdir, 'catalog.json')
+    if database_url:
+        os.environ.setdefault('AUTO_SETUP_DB', '1')
+
+    from backend import create_app
+    return create_app(), workdir
+
+
+def create_games(client, count, finished=0):
+    """Create ``count`` games through the API, finishing the first ``finished`` of them; returns their ids."""
+    camps = client.get('/api/cards?type=camp').get_json()
+    game_ids = []
+    for index in range(count):
+        offset = (index * 3) % max(len(camps) - 5, 1)
+        response = client.post('/api/games', json={
+            'player1_name': f'Bench {index}a',
+            'player2_name': f'Bench {index}b',
+            'player1_camps': camps[offset:offset + 3],
+            'player2_camps': camps[offset + 3:offset + 6]
+        })
+        game_id = response.get_json()['id']
+        client.post(f'/api/games/{game_id}/events', json={'player': 1 + index % 2, 'event_name': 'Raid', 'position': 1})
+        game_ids.append(game_id)
+    for index, game_id in enumerate(game_ids[:finished]):
+        client.post(f'/api/games/{game_id}/finish', json={'winner': 1 + index % 2})
+    return game_ids
@@ -0,0 +1,134 @@
+"""Encode time per API payload, before and after the fast JSON provider.
+
+"stdlib" encodes the way Flask's stock provider does for ``jsonify``;
+"fast" is ``FastJSONProvider`` (orjson when installed) and "msgpack" is
+the body sent for ``Accept: application/msgpack``. The catalog and game
+state rows are also served pre-encoded, so on those endpoints the encoder
+only runs once per catalog or board version.
+
+    python -m benchmarks.encode --games 300 --rounds 5
+"""
+import argparse
+import json
+import time
+
+from flask.json.provider import DefaultJSONProvider
+
+from benchmarks import boot_app, create_games
+
+DEFAULT_GAMES = 200
+DEFAULT_ROUNDS = 5
+TARGET_ROUND_SECONDS = 0.2
+
+
+def per_call(function, rounds):
+    """Best per-call time in seconds over ``rounds`` timed loops of ~TARGET_ROUND_SECONDS."""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - started
+        if elapsed >= TARGET_ROUND_SECONDS / 10 or number >= 1 << 20:
+            break
+        number *= 10
+    number = max(int(number * TARGET_ROUND_SECONDS / max(elapsed, 1e-9)), 1)
+
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = (time.perf_counter() - started) / number
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def collect_payloads(app, game_ids):
+    """Representative response objects keyed by the endpoint that returns them."""
+    from backend import catalog, game_state, stats
+    from backend.game_transfer import export_record
+    from backend.search import search_cards
+
+    with app.test_request_context():
+        snapshot = catalog.get_snapshot()
+        game = game_state.load_game(game_ids[-1])
+        record = export_record(game, game.board_state, game.events)
+        return {
+            'GET /api/cards': snapshot.cards,
+            'GET /api/cards?type=person': snapshot.by_type.get('person', []),
+            'GET /api/cards?search=water': search_cards('water'),
+            'GET /api/games/<id>': game_state.serialize_game(game),
+            'GET /api/games/export (1 line)': record,
+            'GET /api/games/export (500 games)': [record] * 500,
+            'GET /api/stats': stats.get_stats(),
+        }
+
+
+def run(payloads, app, rounds):
+    from backend import json_provider
+
+    stock = DefaultJSONProvider(app)
+    fast = app.json
+    results = []
+    for endpoint, obj in payloads.items():
+        stdlib_body = (stock.dumps(obj, separators=(',', ':')) + "\n").encode('utf-8')
+        fast_body = fast.dumps_bytes(obj) + b"\n"
+        if json.loads(stdlib_body) != json.loads(fast_body):
+            raise SystemExit(f"{endpoint}: fast provider output differs from Flask's")
+
+        result = {
+            "endpoint": endpoint,
+            "stdlib_us": per_call(lambda: (stock.dumps(obj, separators=(',', ':')) + "\n").encode('utf-8'), rounds) * 1e6,
+            "fast_us": per_call(lambda: fast.dumps_bytes(obj) + b"\n", rounds) * 1e6,
+            "json_bytes": len(fast_body),
+            "msgpack_us": None,
+            "msgpack_bytes": None,
+        }
+        if json_provider.msgpack is not None:
+            result["msgpack_us"] = per_call(lambda: fast.packb(obj), rounds) * 1e6
+            result["msgpack_bytes"] = len(fast.packb(obj))
+        results.append(result)
+    return results
+
+
+def _cell(value, digits=1):
+    return '-' if value is None else f"{value:.{digits}f}"
+
+
+def print_table(results):
+    from backend import json_provider
+
+    print(f"JSON encoder: {'orjson' if json_provider.orjson is not None else 'stdlib json'}; "
+          f"msgpack: {'installed' if json_provider.msgpack is not None else 'not installed'}")
+    header = f"{'endpoint':36} {'stdlib µs':>11} {'fast µs':>10} {'speedup':>8} {'msgpack µs':>11} {'JSON B':>9} {'msgpack B':>10}"
+    print(header)
+    print('-' * len(header))
+    for result in results:
+        speedup = result["stdlib_us"] / result["fast_us"] if result["fast_us"] else None
+        print(f"{result['endpoint']:36} {_cell(result['stdlib_us']):>11} {_cell(result['fast_us']):>10} "
+              f"{_cell(speedup, 2) + 'x':>8} {_cell(result['msgpack_us']):>11} "
+              f"{result['json_bytes']:>9} {result['msgpack_bytes'] if result['msgpack_bytes'] is not None else '-':>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', help="Benchmark against this database instead of a temporary SQLite file.")
+    parser.add_argument('--games', type=int, default=DEFAULT_GAMES, help="Games to create before measuring.")
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS, help="Timed rounds per payload; the best is kept.")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON instead of a table.")
+    args = parser.parse_args(argv)
+
+    app, _ = boot_app(args.database_url)
+    client = app.test_client()
+    game_ids = create_games(client, args.games, finished=args.games // 2)
+    payloads = collect_payloads(app, game_ids)
+    results = run(payloads, app, args.rounds)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+
+if __name__ == '__main__':
+    main()
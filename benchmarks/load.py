@@ -0,0 +1,335 @@
+"""Load test: realistic game flows against the /api endpoints.
+
+Each virtual user plays games the way the client does: it creates a game,
+reads it, taps water, patches the board, queues and removes events, ends
+turns, searches cards, undoes, asks the AI for a move and finishes the
+game. Before the games start, every user takes a turn at the catalog,
+batch, stats, export and import endpoints. The SSE stream and card seeding are left out. Requests go
+through Flask's test client, one per thread, so the numbers cover the app
+and its database but not the network.
+
+The report gives p50/p95/p99 latency, throughput and SQL statements per
+request for every endpoint. ``--save`` writes it as a JSON baseline and
+``--compare`` checks a run against one, exiting 1 on regressions:
+
+    python -m benchmarks.load --games 100 --concurrency 4 --save baseline.json
+    python -m benchmarks.load --games 100 --concurrency 4 --compare baseline.json
+
+Pass ``--database-url`` to run against a scratch Postgres database; the
+benchmark writes games into it.
+"""
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from sqlalchemy import event
+
+from benchmarks import boot_app
+
+DEFAULT_GAMES = 50
+DEFAULT_CONCURRENCY = 4
+DEFAULT_TURNS = 6
+DEFAULT_AI_BUDGET_MS = 20
+DEFAULT_THRESHOLD = 0.2
+DEFAULT_MIN_DELTA_MS = 1.0
+SEARCH_TERMS = ('water', 'damage', 'raid', 'punk', 'draw', 'restore', 'camp', 'injure')
+PERCENTILES = (50, 95, 99)
+# Requests an endpoint needs before a percentile is compared; tails of small samples are noise.
+MIN_SAMPLES = {50: 10, 95: 100, 99: 500}
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of sorted ``values``."""
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(math.ceil(q / 100 * len(values)) - 1, 0))]
+
+
+class SqlCounter:
+    """Counts statements sent to the database by the current thread."""
+
+    def __init__(self, engine):
+        self._local = threading.local()
+        event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args):
+        self._local.count = getattr(self._local, 'count', 0) + 1
+
+    def reset(self):
+        self._local.count = 0
+
+    @property
+    def count(self):
+        return getattr(self._local, 'count', 0)
+
+
+class Recorder:
+    def __init__(self):
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def add(self, label, seconds, statements, error):
+        with self._lock:
+            self._samples.setdefault(label, []).append((seconds, statements, error))
+
+    def samples(self):
+        with self._lock:
+            return {label: list(samples) for label, samples in self._samples.items()}
+
+
+class VirtualUser:
+    def __init__(self, app, recorder, counter, rng):
+        self.client = app.test_client()
+        self.recorder = recorder
+        self.counter = counter
+        self.rng = rng
+
+    def request(self, label, method, url, expect=(200,), **kwargs):
+        self.counter.reset()
+        started = time.perf_counter()
+        response = self.client.open(url, method=method, **kwargs)
+        body = response.get_data()
+        seconds = time.perf_counter() - started
+        self.recorder.add(label, seconds, self.counter.count, response.status_code not in expect)
+        response.body = body
+        return response
+
+
+def _version(response, fallback):
+    etag, _ = response.get_etag()
+    return int(etag) if etag and etag.isdigit() else fallback
+
+
+def play_game(user, cards, turns, ai_budget_ms):
+    rng = user.rng
+    camps = rng.sample(cards['camp'], 6)
+    people = cards['person']
+
+    response = user.request('POST /api/games', 'POST', '/api/games', expect=(201,), json={
+        'player1_name': 'Bench A', 'player2_name': 'Bench B',
+        'player1_camps': camps[:3], 'player2_camps': camps[3:]
+    })
+    game_id = response.get_json()['id']
+    base = f'/api/games/{game_id}'
+    response = user.request('GET /api/games/<id>', 'GET', base)
+    version = _version(response, 1)
+
+    player = response.get_json()['board_state']['current_player']
+    for turn in range(turns):
+        for _ in range(2):
+            response = user.request('POST /api/games/<id>/water', 'POST', f'{base}/water',
+                                    json={'player': player, 'amount': -1})
+            version = response.get_json()['version']
+
+        term = rng.choice(SEARCH_TERMS)
+        user.request('GET /api/cards?search', 'GET', f'/api/cards?search={term}')
+
+        column = [{'card_id': person['id']} for person in rng.sample(people, rng.randint(1, 2))]
+        response = user.request('PATCH /api/games/<id>/board', 'PATCH', f'{base}/board', json=[
+            {'op': 'replace', 'path': f'/player{player}_columns/{turn % 3}', 'value': column}
+        ], headers={'If-Match': f'"{version}"'})
+        version = _version(response, version)
+
+        response = user.request('POST /api/games/<id>/events', 'POST', f'{base}/events', expect=(201,), json={
+            'player': player, 'event_name': 'Raid', 'position': rng.randint(0, 2)
+        })
+        version += 1
+        if turn % 2:
+            event_id = response.get_json()['id']
+            user.request('DELETE /api/games/<id>/events/<id>', 'DELETE', f'{base}/events/{event_id}')
+            version += 1
+
+        response = user.request('POST /api/games/<id>/turn', 'POST', f'{base}/turn',
+                                headers={'If-Match': f'"{version}"'})
+        version = _version(response, version)
+        player = response.get_json()['current_player']
+
+        user.request('GET /api/games/<id> (304)', 'GET', base, expect=(304,),
+                     headers={'If-None-Match': f'"{version}"'})
+
+    user.request('GET /api/games/<id>/history/<seq>', 'GET', f'{base}/history/{max(version // 2, 1)}')
+    response = user.request('POST /api/games/<id>/undo', 'POST', f'{base}/undo',
+                            headers={'If-Match': f'"{version}"'})
+    version = _version(response, version)
+    user.request('PUT /api/games/<id>/board', 'PUT', f'{base}/board', json={
+        'player1_columns': [[{'card_id': person['id']}] for person in rng.sample(people, 3)]
+    })
+    if ai_budget_ms:
+        user.request('POST /api/games/<id>/ai-move', 'POST', f'{base}/ai-move',
+                     expect=(200, 409, 503), json={'budget_ms': ai_budget_ms})
+    user.request('POST /api/games/<id>/finish', 'POST', f'{base}/finish', json={'winner': rng.randint(1, 2)})
+    user.request('GET /api/games/<id>', 'GET', base)
+    return game_id
+
+
+def play_session(user, cards):
+    """Requests a client makes around games rather than within one."""
+    user.request('GET /api/health', 'GET', '/api/health')
+    user.request('GET /api/cards', 'GET', '/api/cards')
+    user.request('GET /api/cards?type', 'GET', '/api/cards?type=person')
+    user.request('GET /api/cards?trait', 'GET', '/api/cards?trait=punk')
+    user.request('GET /api/cards?fields&limit', 'GET', '/api/cards?fields=id,name&limit=20')
+    camps = user.rng.sample(cards['camp'], 6)
+    user.request('POST /api/games/batch', 'POST', '/api/games/batch', expect=(201,),
+                 json=[{'player1_camps': camps[:3], 'player2_camps': camps[3:]}] * 10)
+    user.request('GET /api/stats', 'GET', '/api/stats')
+    response = user.request('GET /api/games/export', 'GET', '/api/games/export?limit=20')
+    user.request('POST /api/games/import', 'POST', '/api/games/import', data=response.body,
+                 content_type='application/x-ndjson')
+
+
+def run(app, games, concurrency, turns, ai_budget_ms, seed):
+    from backend import db
+
+    with app.app_context():
+        counter = SqlCounter(db.engine)
+    recorder = Recorder()
+    client = app.test_client()
+    cards = {
+        card_type: client.get(f'/api/cards?type={card_type}').get_json()
+        for card_type in ('camp', 'person')
+    }
+
+    users = [VirtualUser(app, recorder, counter, random.Random(f"{seed}:{index}")) for index in range(concurrency)]
+
+    def worker(index):
+        for _ in range(index, games, concurrency):
+            play_game(users[index], cards, turns, ai_budget_ms)
+
+    started = time.perf_counter()
+    # One user at a time, so the games each export and import sees do not depend on thread timing.
+    for user in users:
+        play_session(user, cards)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(worker, index) for index in range(concurrency)]:
+            future.result()
+    return summarize(recorder.samples(), time.perf_counter() - started)
+
+
+def _stats(samples):
+    latencies = sorted(seconds * 1000 for seconds, _, _ in samples)
+    result = {"requests": len(samples), "errors": sum(1 for _, _, error in samples if error)}
+    for q in PERCENTILES:
+        result[f"p{q}_ms"] = round(percentile(latencies, q), 3)
+    result["mean_ms"] = round(sum(latencies) / len(latencies), 3)
+    result["sql_per_request"] = round(sum(statements for _, statements, _ in samples) / len(samples), 2)
+    return result
+
+
+def summarize(samples, seconds):
+    everything = [sample for endpoint_samples in samples.values() for sample in endpoint_samples]
+    total = _stats(everything)
+    total["seconds"] = round(seconds, 3)
+    total["throughput_rps"] = round(len(everything) / seconds, 1)
+    return {
+        "total": total,
+        "endpoints": {label: _stats(samples[label]) for label in sorted(samples)}
+    }
+
+
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD, min_delta_ms=DEFAULT_MIN_DELTA_MS):
+    """Regressions of ``report`` against ``baseline``, as readable lines."""
+    regressions = []
+
+    def check(label, current, previous):
+        for q in PERCENTILES:
+            if min(current["requests"], previous["requests"]) < MIN_SAMPLES[q]:
+                continue
+            key = f"p{q}_ms"
+            now, before = current[key], previous[key]
+            if now > before * (1 + threshold) and now - before >= min_delta_ms:
+                regressions.append(f"{label}: {key} {before:.2f} -> {now:.2f} ms (+{(now / before - 1) * 100:.0f}%)")
+        if current["sql_per_request"] - previous["sql_per_request"] >= 0.5:
+            regressions.append(f"{label}: SQL statements per request "
+                               f"{previous['sql_per_request']} -> {current['sql_per_request']}")
+        if current["errors"] > previous["errors"]:
+            regressions.append(f"{label}: errors {previous['errors']} -> {current['errors']}")
+
+    for label, current in report["endpoints"].items():
+        previous = baseline["endpoints"].get(label)
+        if previous is not None:
+            check(label, current, previous)
+    check("total", report["total"], baseline["total"])
+    now, before = report["total"]["throughput_rps"], baseline["total"]["throughput_rps"]
+    if now < before * (1 - threshold):
+        regressions.append(f"total: throughput {before} -> {now} req/s ({(now / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def print_report(report):
+    meta = report["meta"]
+    print(f"{meta['games']} games x {meta['turns']} turns at concurrency {meta['concurrency']} "
+          f"on {meta['database']}, {report['total']['seconds']} s")
+    header = f"{'endpoint':36} {'requests':>8} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'SQL/req':>8}"
+    print(header)
+    print('-' * len(header))
+    rows = list(report["endpoints"].items()) + [("total", report["total"])]
+    for label, stats in rows:
+        print(f"{label:36} {stats['requests']:>8} {stats['errors']:>6} {stats['p50_ms']:>8.2f} "
+              f"{stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} {stats['sql_per_request']:>8.2f}")
+    print(f"Throughput: {report['total']['throughput_rps']} requests/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', help="Run against this database instead of a temporary SQLite file.")
+    parser.add_argument('--games', type=int, default=DEFAULT_GAMES)
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help="Virtual users, one thread each.")
+    parser.add_argument('--turns', type=int, default=DEFAULT_TURNS, help="Turns played per game.")
+    parser.add_argument('--ai-budget-ms', type=int, default=DEFAULT_AI_BUDGET_MS,
+                        help="Search budget for the one AI move per game; 0 skips it.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', metavar='PATH', help="Write the report to PATH as a JSON baseline.")
+    parser.add_argument('--compare', metavar='PATH', help="Compare against a saved baseline; exit 1 on regressions.")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown that counts as a regression.")
+    parser.add_argument('--min-delta-ms', type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help="Ignore latency changes smaller than this, however large relatively.")
+    args = parser.parse_args(argv)
+
+    app, _ = boot_app(args.database_url)
+    report = run(app, args.games, args.concurrency, args.turns, args.ai_budget_ms, args.seed)
+    report["meta"] = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        "database": app.config['SQLALCHEMY_DATABASE_URI'].split(':', 1)[0],
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "games": args.games,
+        "concurrency": args.concurrency,
+        "turns": args.turns,
+        "ai_budget_ms": args.ai_budget_ms,
+        "seed": args.seed
+    }
+    print_report(report)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as stream:
+            json.dump(report, stream, indent=2)
+            stream.write("\n")
+        print(f"Saved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as stream:
+            baseline = json.load(stream)
+        settings = ('database', 'games', 'concurrency', 'turns', 'ai_budget_ms')
+        changed = [key for key in settings if baseline["meta"].get(key) != report["meta"][key]]
+        if changed:
+            print(f"Warning: baseline was run with different {', '.join(changed)}")
+        regressions = compare(report, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"{len(regressions)} regressions against {args.compare}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions against {args.compare} (threshold {args.threshold:.0%})")
+
+
+if __name__ == '__main__':
+    main()
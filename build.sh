@@ -8,4 +8,10 @@ npm run build
 echo "Installing Python dependencies..."
 pip install -r requirements.txt
 
+echo "Preparing database and catalog snapshot..."
+flask --app app setup-db
+
+echo "Precompressing frontend assets..."
+flask --app app compress-static
+
 echo "Build complete!"
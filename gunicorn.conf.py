@@ -0,0 +1,35 @@
+import glob
+import os
+import tempfile
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = 'gthread'
+threads = 8
+# Build the app (and its catalog snapshot) once in the master; workers share it copy-on-write.
+preload_app = True
+
+# Workers write request metrics here and GET /api/metrics sums them (backend/metrics.py).
+os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR',
+    os.path.join(tempfile.gettempdir(), f"radlands-metrics-{os.getenv('PORT', '8000')}")
+)
+
+
+def on_starting(server):
+    # Counts from a previous server run would otherwise be added to this one's.
+    directory = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, '*.bin')):
+        os.remove(path)
+
+
+def post_fork(server, worker):
+    from backend import boot
+    boot.mark_start()
+
+
+def post_worker_init(worker):
+    from backend import ai, boot
+    # Fork the AI search processes while the worker still has a single thread.
+    ai.start_pool()
+    boot.mark_ready()
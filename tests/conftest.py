@@ -0,0 +1,28 @@
+import os
+import tempfile
+
+import pytest
+
+
+@pytest.fixture(scope='session')
+def app():
+    workdir = tempfile.mkdtemp(prefix='radlands-test-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'test.db')}"
+    os.environ['CATALOG_SNAPSHOT'] = os.path.join(workdir, 'catalog.json')
+    os.environ.pop('PROMETHEUS_MULTIPROC_DIR', None)
+
+    from backend import create_app
+    return create_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def game(client):
+    """A fresh game as returned by GET /api/games/<id>."""
+    camps = client.get('/api/cards?type=camp').get_json()
+    created = client.post('/api/games', json={'player1_camps': camps[:3], 'player2_camps': camps[3:6]})
+    return client.get(f"/api/games/{created.get_json()['id']}").get_json()
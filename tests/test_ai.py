@@ -0,0 +1,41 @@
+from concurrent.futures import Future
+
+import pytest
+
+from backend import ai
+
+
+def test_ai_move_searches_in_a_separate_process(client, game, monkeypatch):
+    searched_in = []
+    original = ai.search
+    monkeypatch.setattr(ai, 'search', lambda *args: searched_in.append(True) or original(*args))
+
+    response = client.post(f"/api/games/{game['id']}/ai-move", json={'budget_ms': 50})
+    assert response.status_code == 200
+    assert response.get_json()["cached"] is False
+    assert response.get_json()["move"]["kind"]
+    # The patched search only exists in this process; the pool ran the real one.
+    assert searched_in == []
+
+
+
+@pytest.mark.parametrize('budget_ms', [True, 0, -5, "50"])
+def test_ai_move_rejects_bad_budgets(client, game, budget_ms):
+    response = client.post(f"/api/games/{game['id']}/ai-move", json={'budget_ms': budget_ms})
+    assert response.status_code == 400
+
+
+class FailingPool:
+    def submit(self, *args):
+        future = Future()
+        future.set_exception(KeyError(65000))
+        return future
+
+
+def test_search_errors_are_unprocessable(client, game, monkeypatch):
+    monkeypatch.setattr(ai, '_pool_executor', FailingPool)
+
+    response = client.post(f"/api/games/{game['id']}/ai-move", json={'budget_ms': 50})
+    assert response.status_code == 422
+    assert response.get_json()["error"] == "The AI could not search this board: KeyError: 65000"
+    assert response.get_json()["version"] == game['version']
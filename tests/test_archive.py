@@ -0,0 +1,62 @@
+"""Archived games are read-only: writes answer 404 instead of failing."""
+import pytest
+
+
+@pytest.fixture
+def archived(app, client, game):
+    client.post(f"/api/games/{game['id']}/finish", json={'winner': 1})
+    from backend.archive import archive_batch
+    from backend import db
+    with app.app_context():
+        assert archive_batch([game['id']]) == 1
+        db.session.commit()
+    return game
+
+
+@pytest.mark.parametrize('method, path, body', [
+    ('PUT', '/board', {'player1_columns': [[], [], []]}),
+    ('PATCH', '/board', [{'op': 'replace', 'path': '/player1_columns', 'value': [[], [], []]}]),
+    ('POST', '/water', {'player': 1, 'amount': -1}),
+    ('POST', '/events', {'player': 1, 'event_name': 'Raid', 'position': 1}),
+    ('POST', '/turn', None),
+    ('POST', '/undo', None),
+    ('POST', '/ai-move', None),
+])
+def test_writes_to_an_archived_game_are_not_found(client, archived, method, path, body):
+    response = client.open(f"/api/games/{archived['id']}{path}", method=method, json=body,
+                           headers={'If-Match': f"\"{archived['version'] + 1}\""})
+    assert response.status_code == 404
+
+
+def test_archived_game_is_still_readable(client, archived):
+    response = client.get(f"/api/games/{archived['id']}")
+    assert response.status_code == 200
+    assert response.get_json()['winner'] == 1
+
+
+def test_archive_skips_a_game_written_after_it_was_read(app, client, game, monkeypatch):
+    from sqlalchemy import update
+
+    from backend import archive, db
+    from backend.models import BoardState
+
+    capture_state = archive.capture_state
+
+    def capture_then_write(board_state, events):
+        state = capture_state(board_state, events)
+        # Another request commits a write between the read and the delete.
+        with db.engine.begin() as connection:
+            connection.execute(
+                update(BoardState).where(BoardState.game_id == game['id'])
+                .values(version=BoardState.version + 1, player1_water=1)
+            )
+        return state
+
+    monkeypatch.setattr(archive, 'capture_state', capture_then_write)
+    with app.app_context():
+        assert archive.archive_batch([game['id']]) == 0
+        db.session.commit()
+
+    response = client.get(f"/api/games/{game['id']}").get_json()
+    assert response['version'] == game['version'] + 1
+    assert response['board_state']['player1_water'] == 1
@@ -0,0 +1,42 @@
+"""Board writes that lose a race with another request answer 409, not 500."""
+from sqlalchemy import update
+
+from backend import db, routes
+from backend.models import BoardState
+
+
+def _tap_water_after(monkeypatch, game_id):
+    """Commit a water tap from another connection right after the board is validated."""
+    validate = routes.validate_board_fields
+
+    def validate_then_tap(fields):
+        errors = validate(fields)
+        with db.engine.begin() as connection:
+            connection.execute(
+                update(BoardState).where(BoardState.game_id == game_id)
+                .values(version=BoardState.version + 1, player1_water=BoardState.player1_water + 1)
+            )
+        return errors
+
+    monkeypatch.setattr(routes, 'validate_board_fields', validate_then_tap)
+
+
+def test_put_board_racing_a_water_tap(client, game, monkeypatch):
+    _tap_water_after(monkeypatch, game['id'])
+    response = client.put(f"/api/games/{game['id']}/board", json={'player1_columns': [[{'card_id': 5}], [], []]})
+    assert response.status_code == 409
+    assert response.get_json()['version'] == game['version'] + 1
+
+    monkeypatch.undo()
+    current = client.get(f"/api/games/{game['id']}").get_json()
+    assert current['board_state']['player1_columns'] == game['board_state']['player1_columns']
+    assert current['board_state']['player1_water'] == game['board_state']['player1_water'] + 1
+
+
+def test_patch_board_racing_a_water_tap(client, game, monkeypatch):
+    _tap_water_after(monkeypatch, game['id'])
+    response = client.patch(f"/api/games/{game['id']}/board", json=[
+        {'op': 'replace', 'path': '/player1_columns/0', 'value': [{'card_id': 5}]}
+    ], headers={'If-Match': f"\"{game['version']}\""})
+    assert response.status_code == 409
+    assert response.get_json()['version'] == game['version'] + 1
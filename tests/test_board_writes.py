@@ -0,0 +1,83 @@
+"""Board writes that change nothing and undos must not fail or log a duplicate action."""
+
+
+def _actions(app, game_id):
+    from backend.models import GameAction
+    with app.app_context():
+        return GameAction.query.filter_by(game_id=game_id).count()
+
+
+def test_repeated_put_board_is_a_no_op(app, client, game):
+    url = f"/api/games/{game['id']}/board"
+    columns = {'player1_columns': [[{'card_id': 5}], [], []]}
+
+    first = client.put(url, json=columns)
+    assert first.status_code == 200
+    logged = _actions(app, game['id'])
+
+    second = client.put(url, json=columns)
+    assert second.status_code == 200
+    assert second.get_json()['version'] == first.get_json()['version']
+    assert _actions(app, game['id']) == logged
+
+
+def test_put_board_with_current_values_logs_nothing(app, client, game):
+    logged = _actions(app, game['id'])
+    response = client.put(f"/api/games/{game['id']}/board",
+                          json={'player1_camps': game['board_state']['player1_camps']})
+    assert response.status_code == 200
+    assert response.get_json()['version'] == game['version']
+    assert _actions(app, game['id']) == logged
+
+
+def test_patch_with_only_test_ops(app, client, game):
+    logged = _actions(app, game['id'])
+    response = client.patch(f"/api/games/{game['id']}/board", json=[
+        {'op': 'test', 'path': '/player1_columns', 'value': game['board_state']['player1_columns']}
+    ], headers={'If-Match': f"\"{game['version']}\""})
+    assert response.status_code == 200
+    assert response.get_json() == {'version': game['version'], 'changed': []}
+    assert _actions(app, game['id']) == logged
+
+
+def test_patch_replace_with_current_value(app, client, game):
+    logged = _actions(app, game['id'])
+    response = client.patch(f"/api/games/{game['id']}/board", json=[
+        {'op': 'replace', 'path': '/player2_columns', 'value': game['board_state']['player2_columns']}
+    ], headers={'If-Match': f"\"{game['version']}\""})
+    assert response.status_code == 200
+    assert response.get_json()['version'] == game['version']
+    assert _actions(app, game['id']) == logged
+
+    # A real change afterwards still gets the next version.
+    response = client.patch(f"/api/games/{game['id']}/board", json=[
+        {'op': 'replace', 'path': '/player2_columns/0', 'value': [{'card_id': 7}]}
+    ], headers={'If-Match': f"\"{game['version']}\""})
+    assert response.status_code == 200
+    assert response.get_json()['version'] == game['version'] + 1
+
+
+def test_undo_of_an_event_only_change_bumps_the_version(client, game):
+    url = f"/api/games/{game['id']}"
+    client.post(f"{url}/events", json={'player': 1, 'event_name': 'Raid', 'position': 1})
+    response = client.post(f"{url}/undo")
+    assert response.status_code == 200
+    assert response.get_json()['version'] == game['version'] + 2
+
+
+def test_undo_restores_an_event_whose_id_was_reused(client, game):
+    url = f"/api/games/{game['id']}"
+    raid = {'player': 1, 'event_name': 'Raid', 'position': 1}
+    event_id = client.post(f"{url}/events", json=raid).get_json()['id']
+    client.delete(f"{url}/events/{event_id}")
+
+    camps = client.get('/api/cards?type=camp').get_json()
+    other = client.post('/api/games', json={'player1_camps': camps[:3], 'player2_camps': camps[3:6]}).get_json()['id']
+    strike = {'player': 2, 'event_name': 'Strike', 'position': 2}
+    # SQLite hands the freed id to the next event, whichever game it belongs to.
+    assert client.post(f"/api/games/{other}/events", json=strike).get_json()['id'] == event_id
+
+    response = client.post(f"{url}/undo")
+    assert response.status_code == 200
+    assert [event['event_name'] for event in client.get(url).get_json()['events']] == ['Raid']
+    assert [event['id'] for event in client.get(f"/api/games/{other}").get_json()['events']] == [event_id]
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+from sqlalchemy import select, update
+
+from backend import db
+from backend.models import MAX_CARD_ID, BoardState, pack_card_ids, unpack_card_ids
+from backend.schema import migrate_card_lists
+
+
+@pytest.mark.parametrize('card_ids', [[], [1], [0, 7, 300, MAX_CARD_ID], list(range(100))])
+def test_pack_round_trip(card_ids):
+    assert unpack_card_ids(pack_card_ids(card_ids)) == card_ids
+
+
+def test_packed_ids_are_little_endian_uint16():
+    assert pack_card_ids([1, 256]) == b'\x01\x00\x00\x01'
+
+
+@pytest.mark.parametrize('card_ids', [[MAX_CARD_ID + 1], [-1], ['5'], [1.5]])
+def test_out_of_range_ids_are_rejected(card_ids):
+    with pytest.raises(ValueError):
+        pack_card_ids(card_ids)
+
+
+def _export(client, game_id):
+    return json.loads(client.get(f"/api/games/export?after={game_id - 1}&limit=1").get_data(as_text=True))
+
+
+def test_legacy_json_rows_are_read_and_migrated(app, client, game):
+    table = BoardState.__table__
+    with app.app_context():
+        hand = BoardState.query.filter_by(game_id=game['id']).one().player1_hand
+        # A row written before the packed columns existed.
+        db.session.execute(
+            update(table).where(table.c.game_id == game['id'])
+            .values(player1_hand_packed=None, player1_hand=hand)
+        )
+        db.session.commit()
+        assert BoardState.query.filter_by(game_id=game['id']).one().player1_hand == hand
+        assert _export(client, game['id'])['board_state']['player1_hand'] == hand
+
+        assert migrate_card_lists() >= 1
+        row = db.session.execute(select(table).where(table.c.game_id == game['id'])).one()
+        assert unpack_card_ids(row.player1_hand_packed) == hand
+        assert row.player1_hand is None
+        assert row.version == game['version']
+        assert migrate_card_lists() == 0
+
+    assert _export(client, game['id'])['board_state']['player1_hand'] == hand
+
+
+def test_import_rejects_out_of_range_card_ids(client, game):
+    line = _export(client, game['id'])
+    line['board_state']['player2_deck'] = [1, MAX_CARD_ID + 1]
+    response = client.post('/api/games/import', data=json.dumps(line) + "\n", content_type='application/x-ndjson')
+    assert response.status_code == 200
+    progress = json.loads(response.get_data(as_text=True).splitlines()[-1])
+    assert progress['error'].startswith('player2_deck: Card ids must be integers')
+    assert progress['line'] == 1
+    assert progress['imported'] == 0
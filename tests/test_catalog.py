@@ -0,0 +1,70 @@
+"""The in-memory catalog follows changes made through other workers."""
+from sqlalchemy import update
+
+
+def test_snapshot_reloads_after_another_worker_changes_the_catalog(app, client, monkeypatch):
+    from backend import catalog, db
+    from backend.models import Card, CatalogVersion
+
+    monkeypatch.setattr(catalog, 'CHECK_INTERVAL', 0)
+    before = client.get('/api/cards')
+    card = before.get_json()[0]
+
+    # What another worker's import does: change the cards and bump the shared version.
+    with app.app_context():
+        db.session.execute(update(Card).where(Card.id == card['id']).values(water_cost=card['water_cost'] + 5))
+        db.session.commit()
+        catalog.bump_catalog_version()
+        assert db.session.get(CatalogVersion, 1).version >= 1
+
+    after = client.get('/api/cards')
+    assert after.headers['ETag'] != before.headers['ETag']
+    assert after.get_json()[0]['water_cost'] == card['water_cost'] + 5
+
+
+def test_snapshot_file_records_the_catalog_version(app):
+    import json
+
+    from backend import catalog
+    with app.app_context():
+        catalog.refresh()
+        with open(app.config['CATALOG_SNAPSHOT'], encoding='utf-8') as stream:
+            data = json.load(stream)
+        assert data['catalog_version'] == catalog.current_catalog_version()
+        assert data['cards'] == catalog.get_snapshot().cards
+
+
+def test_fields_without_paging_projects_every_card(app, client):
+    from backend import catalog, db
+    from backend.models import Card
+
+    # More cards than one default page.
+    with app.app_context():
+        db.session.add_all(
+            Card(name=f'Test card {index}', card_type='person') for index in range(catalog.DEFAULT_PAGE_SIZE)
+        )
+        db.session.commit()
+        catalog.refresh()
+        total = db.session.query(Card).count()
+
+    response = client.get('/api/cards?fields=id,name')
+    cards = response.get_json()
+    assert len(cards) == total > catalog.DEFAULT_PAGE_SIZE
+    assert set(cards[0]) == {'id', 'name'}
+    assert 'X-Next-Cursor' not in response.headers
+
+    people = client.get('/api/cards?fields=name&type=person').get_json()
+    assert len(people) == len([card for card in client.get('/api/cards').get_json() if card['type'] == 'person'])
+
+    paged = client.get('/api/cards?fields=id&limit=10')
+    assert len(paged.get_json()) == 10
+    assert 'X-Next-Cursor' in paged.headers
+
+
+def test_search_and_trait_reject_a_cursor(client):
+    for query in ('search=raid', 'trait=Tech', 'search=raid&trait=Tech'):
+        response = client.get(f'/api/cards?{query}&after=1')
+        assert response.status_code == 400
+        assert 'after=' in response.get_json()['error']
+
+    assert client.get('/api/cards?search=raid&limit=1').status_code == 200
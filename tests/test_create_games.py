@@ -0,0 +1,35 @@
+import pytest
+
+
+@pytest.fixture
+def camps(client):
+    return client.get('/api/cards?type=camp').get_json()
+
+
+def test_batch_creates_every_game(client, camps):
+    games = [{'player1_camps': camps[:3], 'player2_camps': camps[3:6], 'expansions': []}] * 2
+    response = client.post('/api/games/batch', json={'games': games})
+    assert response.status_code == 201
+    assert len(response.get_json()) == 2
+
+
+@pytest.mark.parametrize('entry, error', [
+    ("not a game", "games[1]: A game must be a JSON object"),
+    ({'expansions': 'Base'}, "games[1]: expansions must be a list of expansion names"),
+    ({'expansions': [1]}, "games[1]: expansions must be a list of expansion names"),
+    ({'player1_camps': [1, 2, 3]}, "games[1]: Camps must be a list of card objects"),
+])
+def test_batch_rejects_malformed_entries(client, camps, entry, error):
+    valid = {'player1_camps': camps[:3], 'player2_camps': camps[3:6]}
+    response = client.post('/api/games/batch', json={'games': [valid, entry]})
+    assert response.status_code == 400
+    assert response.get_json() == {"error": error}
+
+
+def test_batch_must_be_a_list(client):
+    assert client.post('/api/games/batch', json={'games': "abc"}).status_code == 400
+
+
+def test_single_game_rejects_malformed_requests(client):
+    assert client.post('/api/games', json=[]).status_code == 400
+    assert client.post('/api/games', json={'expansions': 'Base'}).status_code == 400
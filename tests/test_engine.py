@@ -0,0 +1,151 @@
+import pytest
+
+from backend.engine import (
+    CAMP, MAX_PEOPLE_PER_COLUMN, STARTING_WATER, CardTable, GameState, load_player, validate_board,
+    validate_board_fields
+)
+
+CARDS = CardTable([
+    {"id": 1, "name": "Outpost", "type": "camp",
+     "abilities": [{"description": "Damage unprotected card", "water_cost": 2}]},
+    {"id": 2, "name": "Bunker", "type": "camp"},
+    {"id": 3, "name": "Silo", "type": "camp"},
+    {"id": 10, "name": "Looter", "type": "person", "water_cost": 1,
+     "abilities": [{"description": "Damage unprotected card", "water_cost": 1}]},
+    {"id": 11, "name": "Sniper", "type": "person", "water_cost": 3,
+     "abilities": [{"description": "Damage any card", "water_cost": 2}]},
+    {"id": 12, "name": "Wall", "type": "person", "water_cost": 1},
+    {"id": 20, "name": "Strafe", "type": "event", "water_cost": 1, "bomb_position": 2,
+     "event_effect": "Damage all people"},
+    {"id": 21, "name": "Flare", "type": "event", "water_cost": 0, "event_effect": "Gain 1 water"},
+])
+
+
+def player(columns=None, camps=(1, 2, 3), hand=(), deck=(), water=3, events=()):
+    return load_player(water, list(camps), columns or [[], [], []], list(hand), list(deck), [], list(events))
+
+
+def state(me=None, opponent=None, current=0):
+    players = [me or player(), opponent or player()]
+    if current:
+        players.reverse()
+    return GameState(CARDS, tuple(players), current)
+
+
+# Protection
+
+def test_people_protect_the_camp_behind_them():
+    side = player(columns=[[10, 12], [], []])
+    assert side.unprotected == ((0, 0), (1, CAMP), (2, CAMP))
+
+
+def test_destroyed_camps_are_not_targets():
+    side = player(camps=[1, {"card_id": 2, "destroyed": True}, 3])
+    assert side.unprotected == ((0, CAMP), (2, CAMP))
+    assert side.live_camps() == [0, 2]
+
+
+def test_unprotected_and_any_targets():
+    game = state(opponent=player(columns=[[12, 10], [], []]))
+    looter, sniper = CARDS[10].ability, CARDS[11].ability
+    assert game.targets(looter, 0) == [(1, 0, 0), (1, 1, CAMP), (1, 2, CAMP)]
+    assert game.targets(sniper, 0) == [(1, 0, 0), (1, 0, 1), (1, 0, CAMP), (1, 1, CAMP), (1, 2, CAMP)]
+
+
+# Damage
+
+def test_damage_marks_a_person_then_destroys_it():
+    game = state(me=player(columns=[[10], [], []]), opponent=player(columns=[[12], [], []]))
+    after = game.apply(('ability', 0, 0, (1, 0, 0)))
+    assert after.players[1].columns[0][0].damaged
+    assert after.players[0].water == 2
+    assert not after.players[0].columns[0][0].ready
+    # The original state is untouched.
+    assert not game.players[1].columns[0][0].damaged
+
+    game = state(me=player(columns=[[10], [], []]), opponent=player(columns=[[{"card_id": 12, "damaged": True}], [], []]))
+    after = game.apply(('ability', 0, 0, (1, 0, 0)))
+    assert after.players[1].columns[0] == ()
+    assert after.players[1].discard == (12,)
+
+
+def test_a_punk_dies_to_one_damage():
+    game = state(me=player(columns=[[10], [], []]), opponent=player(columns=[[{"card_id": 12, "punk": True}], [], []]))
+    after = game.apply(('ability', 0, 0, (1, 0, 0)))
+    assert after.players[1].columns[0] == ()
+
+
+def test_damaged_camp_is_destroyed_and_the_last_one_ends_the_game():
+    game = state(me=player(columns=[[10], [], []]))
+    after = game.apply(('ability', 0, 0, (1, 1, CAMP)))
+    assert after.players[1].camps[1].damaged and not after.players[1].camps[1].destroyed
+
+    opponent = player(camps=[{"card_id": 1, "damaged": True}, {"card_id": 2, "destroyed": True},
+                             {"card_id": 3, "destroyed": True}])
+    after = state(me=player(columns=[[10], [], []]), opponent=opponent).apply(('ability', 0, 0, (1, 0, CAMP)))
+    assert after.players[1].camps[0].destroyed
+    assert after.winner == 0
+    assert after.is_terminal
+    assert after.legal_moves() == []
+
+
+# Column limit
+
+def test_full_columns_take_no_more_people():
+    game = state(me=player(columns=[[10, 12], [], []], hand=[12]))
+    plays = [move for move in game.legal_moves() if move[0] == 'play']
+    assert plays == [('play', 12, 1, 0), ('play', 12, 2, 0)]
+    with pytest.raises(ValueError):
+        game.apply(('play', 12, 0, 0))
+
+
+def test_validate_board_rejects_an_overfull_column():
+    columns = [[10] * (MAX_PEOPLE_PER_COLUMN + 1), [], []]
+    assert validate_board(columns=columns) == [f"Column 0 holds more than {MAX_PEOPLE_PER_COLUMN} people"]
+    assert validate_board(columns=[[], []]) == ["Expected 3 columns"]
+    assert validate_board(columns=[[{"card_id": 10, "destroyed": True}], [], []]) == ["Column 0 has a destroyed person"]
+    assert validate_board_fields({"player2_camps": [1, {"name": "no id"}]}) == ["player2_camps: Camp without an id"]
+    assert validate_board_fields({"player1_columns": [[10, 12], [11], []], "turn_number": 4}) == []
+
+
+# Event queue
+
+def test_events_take_the_first_free_slot_from_their_bomb_position():
+    game = state(me=player(hand=[20, 21]))
+    assert game.apply(('event', 20)).players[0].events == ((2, 20),)
+    assert game.apply(('event', 21)).players[0].events == ((1, 21),)
+
+    game = state(me=player(hand=[20], events=[(2, 21)]))
+    assert game.apply(('event', 20)).players[0].events == ((2, 21), (3, 20))
+
+    game = state(me=player(hand=[20], events=[(2, 21), (3, 21)]))
+    assert ('event', 20) not in game.legal_moves()
+
+
+def test_events_advance_and_resolve_at_the_start_of_their_owners_turn():
+    game = state(opponent=player(events=[(1, 21), (3, 20)], deck=[12]))
+    after = game.apply(('end',))
+    assert after.current == 1
+    side = after.players[1]
+    assert side.events == ((2, 20),)
+    assert side.discard == (21,)
+    assert side.water == STARTING_WATER + 1
+    assert side.hand == (12,)
+
+
+# Move generation
+
+def test_legal_moves_respect_water_and_readiness():
+    me = player(columns=[[{"card_id": 10, "ready": False}], [], []], hand=[11, 12], water=1)
+    assert set(state(me=me).legal_moves()) == {
+        ('play', 12, 0, 0), ('play', 12, 0, 1), ('play', 12, 1, 0), ('play', 12, 2, 0), ('end',)
+    }
+
+
+def test_legal_moves_offer_one_ability_move_per_target():
+    me = player(columns=[[10], [], []], water=3)
+    abilities = [move for move in state(me=me).legal_moves() if move[0] == 'ability']
+    assert abilities == [
+        ('ability', 0, 0, (1, 0, CAMP)), ('ability', 0, 0, (1, 1, CAMP)), ('ability', 0, 0, (1, 2, CAMP)),
+        ('ability', 0, CAMP, (1, 0, CAMP)), ('ability', 0, CAMP, (1, 1, CAMP)), ('ability', 0, CAMP, (1, 2, CAMP)),
+    ]
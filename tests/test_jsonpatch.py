@@ -0,0 +1,142 @@
+import pytest
+
+from backend.jsonpatch import JsonPatchError, JsonPatchTestFailed, apply_patch, parse_pointer, pointer_roots
+
+
+def board():
+    return {
+        "player1_columns": [[{"card_id": 1}], [{"card_id": 2}, {"card_id": 3}], []],
+        "player1_camps": [{"card_id": 10}, {"card_id": 11}, {"card_id": 12}],
+    }
+
+
+def test_parse_pointer_unescapes_tokens():
+    assert parse_pointer('/a~1b/c~0d/0') == ['a/b', 'c~d', '0']
+    with pytest.raises(JsonPatchError):
+        parse_pointer('player1_columns')
+
+
+def test_pointer_roots_reads_path_and_from():
+    operations = [
+        {"op": "move", "from": "/player1_columns/0/0", "path": "/player1_camps/0"},
+        {"op": "test", "path": "/player1_columns/1", "value": []},
+    ]
+    assert pointer_roots(operations) == {"player1_columns", "player1_camps"}
+
+
+def test_add_with_dash_appends():
+    document = board()
+    assert apply_patch(document, [{"op": "add", "path": "/player1_columns/2/-", "value": {"card_id": 4}}]) == [
+        "/player1_columns/2/-"
+    ]
+    assert document["player1_columns"][2] == [{"card_id": 4}]
+
+
+def test_add_inserts_at_an_index():
+    document = board()
+    apply_patch(document, [{"op": "add", "path": "/player1_columns/0/0", "value": {"card_id": 4}}])
+    assert document["player1_columns"][0] == [{"card_id": 4}, {"card_id": 1}]
+
+
+def test_replace_and_remove_list_indices():
+    document = board()
+    apply_patch(document, [
+        {"op": "replace", "path": "/player1_columns/1/0", "value": {"card_id": 5}},
+        {"op": "remove", "path": "/player1_columns/1/1"},
+    ])
+    assert document["player1_columns"][1] == [{"card_id": 5}]
+
+    for path in ("/player1_columns/1/2", "/player1_columns/1/01", "/player1_columns/1/-"):
+        with pytest.raises(JsonPatchError):
+            apply_patch(board(), [{"op": "remove", "path": path}])
+
+
+def test_replace_sets_a_nested_member():
+    document = board()
+    apply_patch(document, [{"op": "replace", "path": "/player1_camps/0/card_id", "value": 13}])
+    assert document["player1_camps"][0] == {"card_id": 13}
+
+
+def test_move_within_one_array():
+    document = board()
+    changed = apply_patch(document, [{"op": "move", "from": "/player1_columns/1/0", "path": "/player1_columns/1/1"}])
+    assert document["player1_columns"][1] == [{"card_id": 3}, {"card_id": 2}]
+    assert changed == ["/player1_columns/1/0", "/player1_columns/1/1"]
+
+
+def test_move_into_itself_is_rejected():
+    with pytest.raises(JsonPatchError):
+        apply_patch(board(), [{"op": "move", "from": "/player1_columns/1", "path": "/player1_columns/1/0"}])
+
+
+def test_copy_deep_copies_the_value():
+    document = board()
+    apply_patch(document, [{"op": "copy", "from": "/player1_columns/0/0", "path": "/player1_columns/2/-"}])
+    document["player1_columns"][2][0]["damaged"] = True
+    assert document["player1_columns"][0][0] == {"card_id": 1}
+
+
+def test_added_values_are_copied_from_the_patch():
+    value = {"card_id": 4}
+    document = board()
+    apply_patch(document, [{"op": "add", "path": "/player1_columns/2/-", "value": value}])
+    value["card_id"] = 99
+    assert document["player1_columns"][2] == [{"card_id": 4}]
+
+
+def test_failed_test_raises():
+    with pytest.raises(JsonPatchTestFailed):
+        apply_patch(board(), [{"op": "test", "path": "/player1_columns/2", "value": [{"card_id": 9}]}])
+
+
+@pytest.mark.parametrize('operation', [
+    {"path": "/player1_columns/0/0"},
+    {"op": "remove"},
+    {"op": "add", "path": "/player1_columns/0/0"},
+    {"op": "frobnicate", "path": "/player1_columns/0/0"},
+    {"op": "remove", "path": "/player1_columns"},
+    {"op": "replace", "path": "/player2_water", "value": 3},
+    {"op": "remove", "path": "/player1_camps/0/missing"},
+])
+def test_malformed_operations_raise(operation):
+    with pytest.raises(JsonPatchError):
+        apply_patch(board(), [operation])
+
+
+# Through PATCH /board
+
+def _patch(client, game, operations):
+    return client.patch(f"/api/games/{game['id']}/board", json=operations,
+                        headers={'If-Match': f"\"{game['version']}\""})
+
+
+def test_failed_test_op_writes_nothing(client, game):
+    response = _patch(client, game, [
+        {"op": "add", "path": "/player1_columns/0/-", "value": {"card_id": 5}},
+        {"op": "test", "path": "/player1_water", "value": 99},
+    ])
+    assert response.status_code == 400
+
+    response = _patch(client, game, [
+        {"op": "add", "path": "/player1_columns/0/-", "value": {"card_id": 5}},
+        {"op": "test", "path": "/player2_columns/0", "value": [{"card_id": 9}]},
+    ])
+    assert response.status_code == 409
+    current = client.get(f"/api/games/{game['id']}").get_json()
+    assert current['version'] == game['version']
+    assert current['board_state']['player1_columns'] == game['board_state']['player1_columns']
+
+
+@pytest.mark.parametrize('operation', [
+    {"op": "add", "value": {"card_id": 5}},
+    {"path": "/player1_columns/0/-", "value": {"card_id": 5}},
+    "add",
+])
+def test_operation_without_path_or_op_is_a_bad_request(client, game, operation):
+    response = _patch(client, game, [operation])
+    assert response.status_code == 400
+    assert client.get(f"/api/games/{game['id']}").get_json()['version'] == game['version']
+
+
+def test_body_must_be_a_patch_array(client, game):
+    assert _patch(client, game, {"op": "add"}).status_code == 400
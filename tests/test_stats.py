@@ -0,0 +1,38 @@
+import json
+
+from backend import stats
+
+
+def _finished_export(client, game):
+    client.post(f"/api/games/{game['id']}/finish", json={'winner': 1})
+    line = client.get(f"/api/games/export?after={game['id'] - 1}&limit=1").get_data(as_text=True)
+    record = json.loads(line)
+    # Finished long before any worker's watermark.
+    record['finished_at'] = '2001-01-01T00:00:00'
+    return json.dumps(record) + "\n"
+
+
+def test_imported_finished_games_reach_warm_workers(app, client, game):
+    line = _finished_export(client, game)
+    before = client.get('/api/stats').get_json()['games']
+
+    progress = client.post('/api/games/import', data=line, content_type='application/x-ndjson').get_data(as_text=True)
+    assert json.loads(progress.splitlines()[-1])['imported'] == 1
+
+    warm = client.get('/api/stats').get_json()
+    assert warm['games'] == before + 1
+
+    with app.app_context():
+        cold = stats.GameStats()
+        cold.refresh()
+        assert cold.summary() == warm
+
+
+def test_imports_of_active_games_keep_the_totals(app, client, game):
+    client.get('/api/stats')
+    with app.app_context():
+        version = stats.current_stats_version()
+    line = client.get(f"/api/games/export?after={game['id'] - 1}&limit=1").get_data(as_text=True)
+    client.post('/api/games/import', data=line, content_type='application/x-ndjson').get_data()
+    with app.app_context():
+        assert stats.current_stats_version() == version
@@ -0,0 +1,46 @@
+"""Stream backlogs never hand a client a change without its base version."""
+from backend.stream import Channel
+
+
+def _kinds(events):
+    return [(version, event.split('\n')[1].split(': ')[1]) for version, event in events]
+
+
+def test_contiguous_changes_are_replayed():
+    channel = Channel(1, 5)
+    channel.publish(6, 'water', '{}')
+    channel.publish(7, 'turn', '{}')
+    assert _kinds(channel.since(5)) == [(6, 'water'), (7, 'turn')]
+    assert _kinds(channel.since(6)) == [(7, 'turn')]
+    assert channel.since(7) == []
+
+
+def test_change_after_a_gap_becomes_a_resync():
+    channel = Channel(1, 5)
+    # Version 6 was written by another worker and not seen yet.
+    channel.publish(7, 'water', '{}')
+    assert _kinds(channel.since(5)) == [(7, 'resync')]
+    channel.publish(8, 'turn', '{}')
+    assert _kinds(channel.since(5)) == [(7, 'resync'), (8, 'turn')]
+
+
+def test_full_state_may_skip_versions():
+    channel = Channel(1, 5)
+    channel.publish(6, 'water', '{}')
+    channel.publish(9, 'state', '{}')
+    channel.publish(10, 'turn', '{}')
+    assert _kinds(channel.since(5)) == [(6, 'water'), (9, 'state'), (10, 'turn')]
+    assert _kinds(channel.since(7)) == [(9, 'state'), (10, 'turn')]
+
+
+def test_reconnect_across_a_gap_needs_a_full_resync():
+    channel = Channel(1, 5)
+    channel.publish(6, 'water', '{}')
+    assert channel.since(3) is None
+
+
+def test_late_older_change_is_dropped():
+    channel = Channel(1, 5)
+    channel.publish(7, 'state', '{}')
+    channel.publish(6, 'water', '{}')
+    assert _kinds(channel.since(5)) == [(7, 'state')]
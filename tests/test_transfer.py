@@ -0,0 +1,36 @@
+import json
+
+
+def _export(client, game):
+    lines = client.get(f"/api/games/export?after={game['id'] - 1}&limit=1").get_data(as_text=True).splitlines()
+    return lines[0]
+
+
+def _import(client, body, chunk_size=1):
+    response = client.post(f"/api/games/import?chunk_size={chunk_size}", data=body,
+                           content_type='application/x-ndjson')
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_import_round_trip(client, game):
+    line = _export(client, game)
+    progress = _import(client, f"{line}\n\n{line}\n")
+    assert progress[-1]["done"] and progress[-1]["imported"] == 2
+
+
+def test_import_error_names_the_ndjson_line(client, game):
+    line = _export(client, game)
+    progress = _import(client, f"{line}\n\n\n{{not json\n{line}\n")
+    assert progress[-1]["error"]
+    assert progress[-1]["line"] == 4
+    assert progress[-1]["imported"] == 1
+
+
+def test_import_error_names_the_line_of_an_invalid_game(client, game):
+    line = _export(client, game)
+    broken = json.loads(line)
+    del broken["board_state"]
+    progress = _import(client, f"\n{line}\n{json.dumps(broken)}\n", chunk_size=2)
+    assert progress[-1]["error"] == "Game is missing its board_state"
+    assert progress[-1]["line"] == 3
+    assert progress[-1]["imported"] == 0